@@ -0,0 +1,152 @@
+""" End-to-end chat flood benchmark of BotHandler, without network
+
+Floods a local fake Twitch IRC server (benchmarks.fake_twitch_irc) at
+increasing rates, read by BotHandler's real pipeline: BotIRCPool,
+MessageQueue, message worker and BotChess.vote_batch, with a game in the
+initial position and our turn (BotChess does not connect to Lichess).
+Reports messages treated per second, votes counted, latency from the
+server sending a message to its vote being counted, and messages
+dropped by the queue.
+
+Run from the repository root:
+    python -m benchmarks.chat_flood
+"""
+
+import sys
+import time
+import types
+import asyncio
+import statistics
+from threading import Thread
+
+RATES = [1000, 5000, 20000]
+DURATION = 5
+CHANNEL = "username"
+
+# BotHandler reads config/config.py, written by each user from
+# config_dist.py, so the benchmark provides its own
+sys.modules["config.config"] = types.SimpleNamespace(
+    config={
+        "twitch": {
+            "irc": {"server": "127.0.0.1", "port": 0, "connections": 1},
+            "account": {"username": CHANNEL, "password": "oauth:token"},
+            "channels": [],
+            "queue": {"max_size": 10000, "policy": "drop_oldest", "batch_size": 256},
+        },
+        "lichess": {"token": "token"},
+        "log": {"level": "INFO"},
+    }
+)
+
+from config.config import config  # noqa: E402
+from bots.botHandler import BotHandler  # noqa: E402
+from bots.botChess import BotChess  # noqa: E402
+from bots.botIRCPool import BotIRCPool  # noqa: E402
+from bots.messageQueue import MessageQueue  # noqa: E402
+from bots.voterRegistry import VoterRegistry  # noqa: E402
+from benchmarks.fake_twitch_irc import FakeTwitchIRC, ChatLoadGenerator  # noqa: E402
+from lib.misc import set_log_level  # noqa: E402
+
+GAME_ID = "game0001"
+
+
+def create_handler():
+    """ Creates BotHandler with its chat pipeline and a BotChess with a game
+        in the initial position and our turn, without connecting to Twitch
+        or Lichess
+    """
+
+    bot_handler = BotHandler.__new__(BotHandler)
+    bot_handler.config = config
+    bot_handler.voter_registry = VoterRegistry()
+    bot_handler.message_queue = MessageQueue(
+        config["twitch"]["queue"]["max_size"], config["twitch"]["queue"]["policy"]
+    )
+    bot_handler.max_messages_batch = config["twitch"]["queue"]["batch_size"]
+    bot_handler.bot_irc = BotIRCPool(
+        config["twitch"], bot_handler.message_queue.put_async
+    )
+
+    bot_chess = BotChess(config["lichess"], bot_handler, connect=False)
+    game_state = bot_chess.adopt_game(GAME_ID, "white")
+    game_state.treat_event(
+        {"type": "gameFull", "state": {"moves": "", "status": "started"}}
+    )
+    bot_handler.bot_chess = bot_chess
+
+    return bot_handler
+
+
+async def bench(rate):
+    """ Floods BotHandler at given rate
+
+    Returns:
+        tuple -- (messages treated/sec, votes counted, latencies (ms),
+            messages dropped)
+    """
+
+    server = FakeTwitchIRC()
+    await server.start()
+    config["twitch"]["irc"]["port"] = server.port
+
+    bot_handler = create_handler()
+
+    # Measures latency of each message when its batch has been treated
+    latencies = []
+    treat_messages = bot_handler.treat_messages
+
+    def treat_messages_timed(messages):
+        treat_messages(messages)
+        now = time.time() * 1000
+        latencies.extend(now - int(message.tags["tmi-sent-ts"]) for message in messages)
+
+    bot_handler.treat_messages = treat_messages_timed
+    Thread(target=bot_handler.thread_treat_messages, daemon=True).start()
+
+    irc_task = asyncio.create_task(bot_handler.bot_irc.run())
+    while CHANNEL not in server.channels:
+        await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    await ChatLoadGenerator(server, CHANNEL, rate).run(DURATION)
+    # Waits for queued messages to be treated
+    while bot_handler.message_queue.get_stats()["depth"] > 0:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.1)
+    elapsed = time.perf_counter() - start
+
+    # Disconnects, so the server serves no more clients
+    irc_task.cancel()
+    try:
+        await irc_task
+    except asyncio.CancelledError:
+        pass
+    server.server.close()
+    await server.server.wait_closed()
+    await asyncio.sleep(0.1)
+
+    votes = bot_handler.bot_chess.game_move_votes.get(GAME_ID)
+    return (
+        len(latencies) / elapsed,
+        votes.get_total() if votes is not None else 0,
+        latencies,
+        bot_handler.message_queue.get_stats()["dropped"],
+    )
+
+
+def main():
+    set_log_level("INFO")
+
+    print("rate (msg/s) | treated (msg/s) | votes | p50 (ms) | p99 (ms) | dropped")
+    for rate in RATES:
+        treated, votes, latencies, dropped = asyncio.run(bench(rate))
+        latencies.sort()
+        print(
+            f"{rate:>12,} | {treated:>15,.0f} | {votes:>5,}"
+            + f" | {statistics.median(latencies):>8.1f}"
+            + f" | {latencies[int(len(latencies) * 0.99)]:>8.1f} | {dropped:>7,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+""" Local stand-in for Twitch IRC and chat load generator
+
+FakeTwitchIRC speaks enough of Twitch's IRC to run the bot without
+network: login (USER/PASS/NICK, 'Login unsuccessful' when the password
+does not start with 'oauth:'), JOIN, PING/PONG and PRIVMSG with tags.
+It answers as testserver.local, the host BotIRC accepts besides Twitch.
+ChatLoadGenerator floods joined channels with a configurable mix of
+moves, commands, noise and emotes at a target rate. Each PRIVMSG carries
+the 'tmi-sent-ts' tag (milliseconds), as Twitch does, so latency can be
+measured on the other side.
+
+Serve a chat flood for a bot configured with server 127.0.0.1 and the
+given port:
+    python -m benchmarks.fake_twitch_irc [port] [messages/sec]
+"""
+
+import sys
+import time
+import random
+import asyncio
+
+import chess
+
+HOST = "testserver.local"
+
+# Default chat mix, as {kind: weight}
+DEFAULT_MIX = {"move": 0.6, "command": 0.02, "noise": 0.28, "emote": 0.1}
+
+NOISE = [
+    "what a game",
+    "why not castle?",
+    "this is going great",
+    "lol",
+    "hello chat",
+    "gg",
+    "the knight is hanging",
+    "can we go e4 please",
+]
+EMOTES = ["Kappa", "PogChamp", "LUL", "Kreygasm", "BibleThump", "4Head"]
+COMMANDS = ["!resign", "!challenge someone", "!help"]
+
+
+class FakeTwitchIRC:
+    """ Fake Twitch IRC server, run in an asyncio event loop """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        """ FakeTwitchIRC constructor
+
+        Keyword Arguments:
+            host {str} -- Address to listen (default: {'127.0.0.1'})
+            port {int} -- Port to listen, 0 for any free port (default: {0})
+        """
+
+        self.host = host
+        self.port = port
+        self.server = None
+
+        # Writers of clients that joined each channel, as {channel: set}
+        self.channels = {}
+
+    async def start(self):
+        """ Starts listening. The port is available after it returns """
+
+        self.server = await asyncio.start_server(
+            self.handle_client, self.host, self.port
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def handle_client(self, reader, writer):
+        """ Serves a client until it disconnects """
+
+        nick = None
+        password = None
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command, _, params = line.decode().rstrip("\r\n").partition(" ")
+
+                if command == "PASS":
+                    password = params
+                elif command == "NICK":
+                    nick = params
+                    if password is None or not password.startswith("oauth:"):
+                        writer.write(
+                            f":{HOST} NOTICE * :Login unsuccessful\r\n".encode()
+                        )
+                    else:
+                        writer.write(
+                            (
+                                f":{HOST} 001 {nick} :Welcome, GLHF!\r\n"
+                                + f":{HOST} 376 {nick} :>\r\n"
+                            ).encode()
+                        )
+                elif command == "JOIN":
+                    channel = params.lstrip("#")
+                    self.channels.setdefault(channel, set()).add(writer)
+                    writer.write(
+                        f":{nick}!{nick}@{nick}.{HOST} JOIN #{channel}\r\n".encode()
+                    )
+                elif command == "PING":
+                    writer.write(f":{HOST} PONG {HOST} {params}\r\n".encode())
+                await writer.drain()
+        except OSError:
+            pass
+        finally:
+            for writers in self.channels.values():
+                writers.discard(writer)
+            writer.close()
+
+    def send_messages(self, channel, messages):
+        """ Sends chat messages to clients that joined given channel
+
+        Arguments:
+            channel {str} -- Channel, without '#'
+            messages {list(tuple)} -- Messages as (user, text)
+        """
+
+        writers = self.channels.get(channel)
+        if not writers:
+            return
+
+        sent_ts = int(time.time() * 1000)
+        data = "".join(
+            f"@display-name={user};tmi-sent-ts={sent_ts} "
+            + f":{user}!{user}@{user}.{HOST} PRIVMSG #{channel} :{text}\r\n"
+            for user, text in messages
+        ).encode()
+        for writer in writers:
+            writer.write(data)
+
+
+class ChatLoadGenerator:
+    """ Generates chat messages with given mix at a target rate """
+
+    # Interval (seconds) between batches of messages
+    TICK = 0.01
+
+    def __init__(self, server, channel, rate, mix=None, num_users=100000):
+        """ ChatLoadGenerator constructor
+
+        Arguments:
+            server {FakeTwitchIRC} -- Server to send messages from
+            channel {str} -- Channel to flood, without '#'
+            rate {float} -- Messages per second
+
+        Keyword Arguments:
+            mix {dict} -- Chat mix as {kind: weight}, kinds are 'move',
+                'command', 'noise' and 'emote' (default: {DEFAULT_MIX})
+            num_users {int} -- Number of distinct users (default: {100000})
+        """
+
+        self.server = server
+        self.channel = channel
+        self.rate = rate
+        self.mix = mix if mix is not None else DEFAULT_MIX
+        self.users = [f"user{i}" for i in range(num_users)]
+
+        # Moves voted for: SAN and UCI of the legal moves in the initial
+        # position, and some illegal ones
+        board = chess.Board()
+        self.moves = [board.san(move) for move in board.legal_moves]
+        self.moves += [move.uci() for move in board.legal_moves]
+        self.moves += ["Ke2", "e5", "O-O", "Qh5"]
+
+        self.num_sent = 0
+
+    def generate(self, num_messages):
+        """ Generates chat messages
+
+        Arguments:
+            num_messages {int} -- Number of messages
+
+        Returns:
+            list(tuple) -- Messages as (user, text)
+        """
+
+        kinds = random.choices(
+            list(self.mix.keys()), list(self.mix.values()), k=num_messages
+        )
+        texts = {
+            "move": self.moves,
+            "command": COMMANDS,
+            "noise": NOISE,
+            "emote": EMOTES,
+        }
+        return [
+            (random.choice(self.users), random.choice(texts[kind])) for kind in kinds
+        ]
+
+    async def run(self, duration):
+        """ Sends messages at target rate for given time
+
+        Arguments:
+            duration {float} -- Time (seconds) to send messages
+        """
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        while loop.time() - start < duration:
+            # Messages due since start, so the rate holds despite delays
+            num_due = int((loop.time() - start) * self.rate) - self.num_sent
+            if num_due > 0:
+                self.server.send_messages(self.channel, self.generate(num_due))
+                self.num_sent += num_due
+            await asyncio.sleep(ChatLoadGenerator.TICK)
+
+
+async def serve(port, rate):
+    """ Serves chat flood forever to clients that join any channel """
+
+    server = FakeTwitchIRC(port=port)
+    await server.start()
+    print(f"Fake Twitch IRC listening on 127.0.0.1:{server.port}")
+
+    generators = {}
+    while True:
+        for channel in server.channels:
+            if channel not in generators:
+                print(f"Flooding #{channel} with {rate} messages/sec")
+                generators[channel] = asyncio.create_task(
+                    ChatLoadGenerator(server, channel, rate).run(float("inf"))
+                )
+        await asyncio.sleep(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        serve(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 6667,
+            float(sys.argv[2]) if len(sys.argv) > 2 else 1000,
+        )
+    )
@@ -0,0 +1,88 @@
+""" Microbenchmark of IRC line parsing (lines/sec)
+
+Compares BotIRC.parse_line with the previous implementation, which ran
+check_has_message and parse_message (four uncompiled regexes) for each line.
+
+Run from the repository root:
+    python -m benchmarks.irc_parser
+"""
+
+import re
+import time
+
+from bots.botIRC import BotIRC
+
+LINES = [
+    ":viewer1!viewer1@viewer1.tmi.twitch.tv PRIVMSG #channel :e4",
+    ":someone_else!someone_else@someone_else.tmi.twitch.tv PRIVMSG #channel :Nf3",
+    ":viewer1!viewer1@viewer1.tmi.twitch.tv PRIVMSG #channel :!resign",
+    ":viewer_2!viewer_2@viewer_2.tmi.twitch.tv PRIVMSG #channel :what a game PogChamp",
+    "@badge-info=;badges=;color=#1E90FF;display-name=Viewer3;emotes=;"
+    + "id=b34ccfc7-4977-403a-8a94-33c6bac34fb8;mod=0;room-id=1337;subscriber=0;"
+    + "tmi-sent-ts=1507246572675;turbo=0;user-id=1337;user-type= "
+    + ":viewer3!viewer3@viewer3.tmi.twitch.tv PRIVMSG #channel :e7e5",
+    "PING :tmi.twitch.tv",
+]
+
+
+def legacy_parse(line):
+    """ Previous implementation: check_has_message + parse_message """
+
+    if not re.match(
+        r"^:[a-zA-Z0-9_]+\![a-zA-Z0-9_]+@[a-zA-Z0-9_]"
+        + r"+(\.tmi\.twitch\.tv|\.testserver\.local) "
+        + r"PRIVMSG #[a-zA-Z0-9_]+ :.+$",
+        line,
+    ):
+        return None
+    return {
+        "channel": re.findall(
+            r"^:.+\![a-zA-Z0-9_]+@[a-zA-Z0-9_]" + r"+.+ PRIVMSG (.*?) :", line
+        )[0],
+        "username": re.findall(r"^:([a-zA-Z0-9_]+)\!", line)[0],
+        "message": re.findall(r"PRIVMSG #[a-zA-Z0-9_]+ :(.+)", line)[0],
+    }
+
+
+def current_parse(line):
+    """ Current implementation: BotIRC.parse_line + field access """
+
+    message = BotIRC.parse_line(line)
+    if message is None or message.command != "PRIVMSG":
+        return None
+    return (message.channel, message.username, message.message)
+
+
+def bench(parse, lines, repeat=5):
+    """ Gets best lines/sec of given parse function over given lines """
+
+    best = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            parse(line)
+        best = max(best, len(lines) / (time.perf_counter() - start))
+    return best
+
+
+def main():
+    lines = LINES * 20000
+
+    legacy = bench(legacy_parse, lines)
+    current = bench(current_parse, lines)
+
+    # Chat messages the previous implementation did not recognize
+    # (the ones with IRCv3 tags)
+    lost = sum(
+        1
+        for line in LINES
+        if current_parse(line) is not None and legacy_parse(line) is None
+    )
+
+    print(f"{len(lines)} lines")
+    print(f"legacy:  {legacy:>12,.0f} lines/sec ({lost}/{len(LINES)} lines lost)")
+    print(f"current: {current:>12,.0f} lines/sec ({current / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+""" Offline benchmark of BotChess against a local mock of the Lichess API
+
+Runs BotChess (session, rate limiter, scheduler, streams and game workers)
+against benchmarks.mock_lichess, so nothing reaches lichess.org:
+
+- Polling overhead: requests per second by endpoint while IDLE_GAMES games
+  wait for the opponent to move.
+- Move submission latency: time from a vote (vote_batch) to the mock
+  receiving the move, in a game whose opponent replies after REPLY_DELAY,
+  without faults and with latency, 500 errors and 429 injected. Votes lost
+  (the move failed and was dropped) are voted again.
+
+Run from the repository root:
+    python -m benchmarks.lichess_offline
+"""
+
+import time
+import random
+import statistics
+import itertools
+from threading import Thread
+
+from bots.botChess import BotChess
+from bots.voterRegistry import VoterRegistry
+from benchmarks.mock_lichess import MockLichess
+from lib.misc import set_log_level
+
+IDLE_GAMES = 4
+IDLE_DURATION = 10
+MOVES = 50
+REPLY_DELAY = 0.25
+# Time (seconds) to wait for a vote to become a move before voting again
+MOVE_TIMEOUT = 3
+# Time (seconds) to wait for our turn in the bot
+TURN_TIMEOUT = 10
+
+# Scenarios as (name, faults of the mock)
+SCENARIOS = [
+    ("no faults", {}),
+    ("50 ms latency", {"latency": 0.05}),
+    ("5% errors", {"error_rate": 0.05}),
+    ("5% 429", {"rate_429": 0.05, "retry_after": 1}),
+]
+
+
+class BotHandlerStub:
+    """ Methods of BotHandler used by BotChess, which needs the bot
+        configuration
+    """
+
+    def __init__(self):
+        self.voter_registry = VoterRegistry()
+
+    def set_users_as_already_voted(self, game_id, users):
+        return self.voter_registry.add_many(game_id, users)
+
+    def reset_users_voted_moves(self, game_id):
+        self.voter_registry.reset(game_id)
+
+    def evict_finished_games(self, ongoing_game_ids):
+        self.voter_registry.evict(ongoing_game_ids)
+
+    def treat_game_result(self, game_id, result):
+        pass
+
+
+def wait_my_turn(bot_chess, mock, game_id):
+    """ Waits until it is our turn in given game, as the bot sees it after
+        getting every move made in the mock
+
+    Returns:
+        GameState or None -- Game state or None if the game has ended
+    """
+
+    deadline = time.perf_counter() + TURN_TIMEOUT
+    while time.perf_counter() < deadline:
+        if mock.is_over(game_id):
+            return None
+        game_state = bot_chess.get_game_state(game_id)
+        if (
+            game_state is not None
+            and game_state.is_my_turn()
+            and game_state.get_ply() == mock.get_ply(game_id)
+        ):
+            return game_state
+        time.sleep(0.001)
+    raise RuntimeError(f"Bot did not get its turn in game {game_id}")
+
+
+def bench_polling(mock):
+    """ Gets requests per second by endpoint while games are idle """
+
+    for i in range(IDLE_GAMES):
+        mock.add_game(f"idle{i}", color="black", opponent_id=f"opponent{i}")
+    # Lets the bot start handling the games
+    time.sleep(3)
+
+    mock.reset_stats()
+    time.sleep(IDLE_DURATION)
+    return {route: count / IDLE_DURATION for route, count in mock.requests.items()}
+
+
+def bench_moves(bot_chess, mock, game_ids):
+    """ Makes MOVES moves through votes
+
+    Returns:
+        tuple -- (latencies (ms), votes lost, requests/sec)
+    """
+
+    mock.reset_stats()
+    start = time.perf_counter()
+
+    game_id = next(game_ids)
+    mock.add_game(game_id)
+    latencies = []
+    lost = 0
+    users = (f"user{i}" for i in itertools.count())
+
+    while len(latencies) < MOVES:
+        if mock.is_over(game_id):
+            game_id = next(game_ids)
+            mock.add_game(game_id)
+
+        game_state = wait_my_turn(bot_chess, mock, game_id)
+        if game_state is None:
+            continue
+        ply = mock.get_ply(game_id)
+        move = random.choice(list(game_state.get_board().legal_moves)).uci()
+
+        vote_time = time.perf_counter()
+        bot_chess.vote_batch(game_id, [(next(users), move)])
+        move_time = mock.wait_move(game_id, ply + 1, MOVE_TIMEOUT)
+        if move_time is None:
+            lost += 1
+        else:
+            latencies.append((move_time - vote_time) * 1000)
+
+    elapsed = time.perf_counter() - start
+    return latencies, lost, sum(mock.requests.values()) / elapsed
+
+
+def main():
+    set_log_level("ERROR")
+
+    mock = MockLichess(reply_delay=None)
+    Thread(target=mock.serve_forever, daemon=True).start()
+    bot_chess = BotChess(
+        {"token": "token", "base_url": mock.base_url}, BotHandlerStub()
+    )
+
+    print(f"Polling overhead, {IDLE_GAMES} idle games ({IDLE_DURATION}s)")
+    print("endpoint                  | requests/s")
+    for route, rate in sorted(bench_polling(mock).items()):
+        print(f"{route:<25} | {rate:>10.2f}")
+
+    print(f"\nMove submission latency, {MOVES} moves")
+    print("scenario      | p50 (ms) | p99 (ms) | lost | requests/s | 500 | 429")
+    mock.reply_delay = REPLY_DELAY
+    game_ids = (f"game{i}" for i in itertools.count())
+    for name, faults in SCENARIOS:
+        mock.latency = faults.get("latency", 0)
+        mock.error_rate = faults.get("error_rate", 0)
+        mock.rate_429 = faults.get("rate_429", 0)
+        mock.retry_after = faults.get("retry_after", 60)
+
+        latencies, lost, rate = bench_moves(bot_chess, mock, game_ids)
+        latencies.sort()
+        print(
+            f"{name:<13} | {statistics.median(latencies):>8.1f}"
+            + f" | {latencies[int(len(latencies) * 0.99)]:>8.1f} | {lost:>4}"
+            + f" | {rate:>10.2f} | {mock.faults[500]:>3} | {mock.faults[429]:>3}"
+        )
+
+
+if __name__ == "__main__":
+    main()
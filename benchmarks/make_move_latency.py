@@ -0,0 +1,90 @@
+""" Latency benchmark of make_move against a local mock of the Lichess API
+
+Makes moves through berserk with a new connection for each request (as
+seek_game did with requests.post), with the default berserk TokenSession
+and with the shared LichessSession, from 1 and 16 threads (games moving
+at the same time). Each move is made in a new game of the mock
+(benchmarks.mock_lichess), whose opponents never reply. The mock answers
+over plain HTTP on localhost, so TLS handshakes saved by keep-alive in
+production are not counted.
+
+Run from the repository root:
+    python -m benchmarks.make_move_latency
+"""
+
+import statistics
+import time
+import itertools
+from threading import Thread
+
+import berserk
+import requests
+
+from bots.lichessSession import LichessSession
+from benchmarks.mock_lichess import MockLichess
+
+MOVES_PER_THREAD = 500
+THREADS = [1, 16]
+
+
+class NoSession(berserk.TokenSession):
+    """ Opens a new connection for each request """
+
+    def request(self, method, url, **kwargs):
+        kwargs["headers"] = {**self.headers, **(kwargs.get("headers") or {})}
+        return requests.request(method, url, **kwargs)
+
+
+def bench(session, mock, game_numbers, num_threads):
+    """ Gets make_move latencies (seconds) with given session and threads """
+
+    client = berserk.Client(session, base_url=mock.base_url)
+    latencies = [[] for _ in range(num_threads)]
+
+    def mover(i):
+        for _ in range(MOVES_PER_THREAD):
+            game_id = f"game{next(game_numbers)}"
+            mock.add_game(game_id)
+            start = time.perf_counter()
+            client.bots.make_move(game_id, "e2e4")
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [Thread(target=mover, args=(i,)) for i in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return sorted(latency for thread in latencies for latency in thread)
+
+
+def main():
+    mock = MockLichess(reply_delay=None)
+    Thread(target=mock.serve_forever, daemon=True).start()
+    # Shared by all threads, each move is made in a new game
+    game_numbers = itertools.count()
+
+    sessions = [
+        ("new connection", lambda: NoSession("token")),
+        ("TokenSession", lambda: berserk.TokenSession("token")),
+        # Rate limiter lets every request through, so the connection pool is
+        # measured and not the limiter
+        ("LichessSession", lambda: LichessSession("token", rate=1e9, burst=1000)),
+    ]
+
+    print("threads | session        | p50 (ms) | p99 (ms)")
+    for num_threads in THREADS:
+        for name, create_session in sessions:
+            latencies = bench(create_session(), mock, game_numbers, num_threads)
+            p50 = statistics.median(latencies)
+            p99 = latencies[int(len(latencies) * 0.99)]
+            print(
+                f"{num_threads:>7} | {name:<14}"
+                + f" | {p50 * 1000:>8.2f} | {p99 * 1000:>8.2f}"
+            )
+
+    mock.shutdown()
+
+
+if __name__ == "__main__":
+    main()
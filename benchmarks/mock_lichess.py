@@ -0,0 +1,594 @@
+""" Local stand-in for the Lichess API
+
+MockLichess serves the endpoints BotChess uses through berserk, so the
+bot can run without network (set 'base_url' in the Lichess configuration
+to the mock address):
+
+    GET /api/account -- Account, with W-D-L counted from mock games
+    GET /api/account/playing -- Ongoing games (get_ongoing)
+    GET /api/stream/event -- Incoming events, only keep-alive lines
+    GET /api/bot/game/stream/{id} -- Game state stream
+    POST /api/bot/game/{id}/move/{move} -- Makes move
+    POST /api/bot/game/{id}/resign -- Resigns game
+    GET /api/users/status -- Online status of users
+    POST /api/users -- Users by ID
+    GET /api/games/user/{username} -- Finished games (ndjson)
+    POST /api/challenge/{id}/accept and /decline -- Answers challenge
+
+Opponents reply to each move with a random legal one after a configurable
+delay. Every request is answered after the configured latency, and
+requests other than streams fail at the configured rates with 500 or 429
+(with Retry-After), as Lichess does when overloaded or rate limiting.
+
+Serve a game against a bot configured with base_url http://127.0.0.1:port:
+    python -m benchmarks.mock_lichess [port] [latency] [error_rate] [rate_429]
+"""
+
+import re
+import sys
+import json
+import time
+import random
+from collections import Counter
+from threading import Thread, Condition, Timer
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import chess
+
+USERNAME = "twitchplayschess"
+
+
+class MockLichess(ThreadingHTTPServer):
+    """ Mock of the Lichess API, with mock games and faults """
+
+    daemon_threads = True
+
+    # Interval (seconds) to send a keep-alive line to idle streams, as
+    # Lichess does
+    KEEPALIVE_INTERVAL = 6
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=0,
+        error_rate=0,
+        rate_429=0,
+        retry_after=60,
+        reply_delay=0,
+    ):
+        """ MockLichess constructor
+
+        Keyword Arguments:
+            host {str} -- Address to listen (default: {'127.0.0.1'})
+            port {int} -- Port to listen, 0 for any free port (default: {0})
+            latency {float} -- Time (seconds) to wait before answering each
+                request (default: {0})
+            error_rate {float} -- Ratio of requests answered with 500, streams
+                excluded (default: {0})
+            rate_429 {float} -- Ratio of requests answered with 429, streams
+                excluded (default: {0})
+            retry_after {float} -- Retry-After (seconds) of 429 answers
+                (default: {60})
+            reply_delay {float or None} -- Time (seconds) opponents take to
+                reply to a move, None to never reply (default: {0})
+        """
+
+        super().__init__((host, port), MockLichessHandler)
+        self.port = self.server_address[1]
+        self.base_url = f"http://{host}:{self.port}"
+
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.reply_delay = reply_delay
+
+        # Games as {game_id: game}, see add_game
+        self.games = {}
+        # Online status of users, users not in it are online
+        self.online = {}
+        # Our wins, draws and losses
+        self.count = {"win": 0, "draw": 0, "loss": 0}
+        # Guards games and wakes up streams when they change
+        self.condition = Condition()
+
+        # Requests by endpoint, as {'METHOD route': count}, and faults
+        # injected, as {status: count}
+        self.requests = Counter()
+        self.faults = Counter()
+
+    def add_game(self, game_id, color="white", opponent_id="opponent"):
+        """ Starts game in the initial position
+
+        Arguments:
+            game_id {str} -- Game ID
+
+        Keyword Arguments:
+            color {str} -- Our color, 'white' or 'black' (default: {'white'})
+            opponent_id {str} -- Opponent user ID (default: {'opponent'})
+        """
+
+        with self.condition:
+            self.games[game_id] = {
+                "id": game_id,
+                "color": color,
+                "opponent_id": opponent_id,
+                "board": chess.Board(),
+                "status": "started",
+                "winner": None,
+                # Time (perf_counter) each move was made, by ply
+                "move_times": [],
+            }
+            self.condition.notify_all()
+
+        # Opponent starts when we are black
+        if color == "black":
+            self.schedule_reply(game_id)
+
+    def push_move(self, game, move):
+        """ Makes move in given game and ends it if it is over. Must be
+            called with condition held
+
+        Arguments:
+            game {dict} -- Game
+            move {chess.Move} -- Legal move
+        """
+
+        game["board"].push(move)
+        game["move_times"].append(time.perf_counter())
+
+        outcome = game["board"].outcome()
+        if outcome is not None:
+            if outcome.termination == chess.Termination.CHECKMATE:
+                game["status"] = "mate"
+            elif outcome.termination == chess.Termination.STALEMATE:
+                game["status"] = "stalemate"
+            else:
+                game["status"] = "draw"
+            game["winner"] = (
+                chess.COLOR_NAMES[outcome.winner]
+                if outcome.winner is not None
+                else None
+            )
+            self.count_result(game)
+
+        self.condition.notify_all()
+
+    def end_game(self, game, status, winner):
+        """ Ends given game. Must be called with condition held
+
+        Arguments:
+            game {dict} -- Game
+            status {str} -- Game status, as 'resign'
+            winner {str or None} -- 'white', 'black' or None for draw
+        """
+
+        game["status"] = status
+        game["winner"] = winner
+        self.count_result(game)
+        self.condition.notify_all()
+
+    def count_result(self, game):
+        """ Counts our result in given finished game """
+
+        if game["winner"] is None:
+            self.count["draw"] += 1
+        elif game["winner"] == game["color"]:
+            self.count["win"] += 1
+        else:
+            self.count["loss"] += 1
+
+    def schedule_reply(self, game_id):
+        """ Makes opponent reply in given game after the reply delay """
+
+        if self.reply_delay is None:
+            return
+        timer = Timer(self.reply_delay, self.reply, args=(game_id,))
+        timer.daemon = True
+        timer.start()
+
+    def reply(self, game_id):
+        """ Makes random legal move for opponent in given game """
+
+        with self.condition:
+            game = self.games.get(game_id)
+            if game is None or game["status"] != "started":
+                return
+            move = random.choice(list(game["board"].legal_moves))
+            self.push_move(game, move)
+
+    def wait_move(self, game_id, ply, timeout=None):
+        """ Waits until given ply is made in given game
+
+        Arguments:
+            game_id {str} -- Game ID
+            ply {int} -- Ply (1 is the first move)
+
+        Keyword Arguments:
+            timeout {float} -- Time (seconds) to wait (default: {None},
+                waits forever)
+
+        Returns:
+            float or None -- Time (perf_counter) ply was made, None on
+                timeout
+        """
+
+        with self.condition:
+            game = self.games[game_id]
+            if not self.condition.wait_for(
+                lambda: len(game["move_times"]) >= ply, timeout
+            ):
+                return None
+            return game["move_times"][ply - 1]
+
+    def get_ply(self, game_id):
+        """ Gets number of moves made in given game """
+
+        with self.condition:
+            return len(self.games[game_id]["move_times"])
+
+    def is_over(self, game_id):
+        """ Gets if given game has ended """
+
+        with self.condition:
+            return self.games[game_id]["status"] != "started"
+
+    def get_ongoing(self):
+        """ Gets ongoing games, as Lichess lists them
+
+        Returns:
+            list(dict) -- Ongoing games
+        """
+
+        with self.condition:
+            return [
+                {
+                    "gameId": game["id"],
+                    "fullId": game["id"] + "0000",
+                    "color": game["color"],
+                    "fen": game["board"].fen(),
+                    "isMyTurn": game["board"].turn == (game["color"] == "white"),
+                    "opponent": {
+                        "id": game["opponent_id"],
+                        "username": game["opponent_id"],
+                    },
+                }
+                for game in self.games.values()
+                if game["status"] == "started"
+            ]
+
+    def get_game_event(self, game, full=False):
+        """ Gets event of game state stream. Must be called with condition
+            held
+
+        Arguments:
+            game {dict} -- Game
+
+        Keyword Arguments:
+            full {bool} -- True for 'gameFull' (first event), False for
+                'gameState' (default: {False})
+
+        Returns:
+            dict -- Event
+        """
+
+        state = {
+            "type": "gameState",
+            "moves": " ".join(move.uci() for move in game["board"].move_stack),
+            "status": game["status"],
+        }
+        if game["winner"] is not None:
+            state["winner"] = game["winner"]
+        if not full:
+            return state
+
+        players = {
+            game["color"]: {"id": USERNAME, "name": USERNAME},
+            chess.COLOR_NAMES[game["color"] == "black"]: {
+                "id": game["opponent_id"],
+                "name": game["opponent_id"],
+            },
+        }
+        return {
+            "type": "gameFull",
+            "id": game["id"],
+            "rated": False,
+            "variant": {"key": "standard"},
+            "initialFen": "startpos",
+            "white": players["white"],
+            "black": players["black"],
+            "state": state,
+        }
+
+    def reset_stats(self):
+        """ Forgets requests and faults counted """
+
+        self.requests.clear()
+        self.faults.clear()
+
+
+class MockLichessHandler(BaseHTTPRequestHandler):
+    """ Handler of MockLichess requests """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are sent separately, which Nagle's algorithm would
+    # delay until the client acknowledges the headers
+    disable_nagle_algorithm = True
+
+    # Endpoints as (method, path pattern, route, handler name), streams are
+    # not faulted
+    ROUTES = [
+        ("GET", r"/api/account", "account", "get_account"),
+        ("GET", r"/api/account/playing", "account/playing", "get_playing"),
+        ("GET", r"/api/stream/event", "stream/event", "stream_events"),
+        ("GET", r"/api/bot/game/stream/(\w+)", "bot/game/stream", "stream_game"),
+        ("POST", r"/api/bot/game/(\w+)/move/(\w+)", "bot/game/move", "post_move"),
+        ("POST", r"/api/bot/game/(\w+)/resign", "bot/game/resign", "post_resign"),
+        ("GET", r"/api/users/status", "users/status", "get_users_status"),
+        ("POST", r"/api/users", "users", "post_users"),
+        ("GET", r"/api/games/user/(\w+)", "games/user", "get_user_games"),
+        (
+            "POST",
+            r"/api/challenge/(\w+)/(accept|decline)",
+            "challenge",
+            "post_challenge",
+        ),
+    ]
+    STREAMS = ("stream_events", "stream_game")
+
+    def do_GET(self):
+        self.route("GET")
+
+    def do_POST(self):
+        self.route("POST")
+
+    def route(self, method):
+        """ Answers request with the handler of its endpoint, after the
+            latency and unless a fault is injected
+
+        Arguments:
+            method {str} -- HTTP method
+        """
+
+        server = self.server
+        url = urlparse(self.path)
+        self.params = parse_qs(url.query)
+        # Reads body, so the connection can be kept alive
+        length = int(self.headers.get("Content-Length", 0))
+        self.body = self.rfile.read(length).decode() if length > 0 else ""
+
+        for route_method, pattern, route, handler in MockLichessHandler.ROUTES:
+            match = re.fullmatch(pattern, url.path)
+            if route_method == method and match is not None:
+                break
+        else:
+            self.send_json(404, {"error": "Not found"})
+            return
+
+        server.requests[f"{method} {route}"] += 1
+        if server.latency > 0:
+            time.sleep(server.latency)
+
+        if handler not in MockLichessHandler.STREAMS:
+            fault = random.random()
+            if fault < server.rate_429:
+                server.faults[429] += 1
+                self.send_json(
+                    429,
+                    {"error": "Too many requests"},
+                    {"Retry-After": str(server.retry_after)},
+                )
+                return
+            if fault < server.rate_429 + server.error_rate:
+                server.faults[500] += 1
+                self.send_json(500, {"error": "Internal server error"})
+                return
+
+        getattr(self, handler)(*match.groups())
+
+    def get_account(self):
+        with self.server.condition:
+            count = dict(self.server.count)
+        count["all"] = sum(count.values())
+        self.send_json(200, {"id": USERNAME, "username": USERNAME, "count": count})
+
+    def get_playing(self):
+        self.send_json(200, {"nowPlaying": self.server.get_ongoing()})
+
+    def stream_events(self):
+        """ Sends keep-alive lines until the client disconnects """
+
+        self.start_stream()
+        try:
+            while True:
+                self.send_chunk("\n")
+                time.sleep(MockLichess.KEEPALIVE_INTERVAL)
+        except OSError:
+            # Client disconnected
+            pass
+
+    def stream_game(self, game_id):
+        """ Sends game state when it changes (full state first), until the
+            game ends or the client disconnects
+        """
+
+        server = self.server
+        with server.condition:
+            game = server.games.get(game_id)
+        if game is None:
+            self.send_json(404, {"error": "No such game"})
+            return
+
+        self.start_stream()
+        ply = None
+        status = None
+        try:
+            while status in (None, "started"):
+                with server.condition:
+                    changed = server.condition.wait_for(
+                        lambda: len(game["board"].move_stack) != ply
+                        or game["status"] != status,
+                        MockLichess.KEEPALIVE_INTERVAL,
+                    )
+                    if changed:
+                        event = server.get_game_event(game, full=ply is None)
+                        ply = len(game["board"].move_stack)
+                        status = game["status"]
+                self.send_chunk(json.dumps(event) + "\n" if changed else "\n")
+            self.send_chunk("")
+        except OSError:
+            # Client disconnected
+            pass
+
+    def post_move(self, game_id, move):
+        server = self.server
+        with server.condition:
+            game = server.games.get(game_id)
+            if game is None:
+                self.send_json(404, {"error": "No such game"})
+                return
+
+            board = game["board"]
+            try:
+                move = chess.Move.from_uci(move)
+            except ValueError:
+                move = None
+            if (
+                game["status"] != "started"
+                or board.turn != (game["color"] == "white")
+                or move not in board.legal_moves
+            ):
+                self.send_json(400, {"error": "Not your turn, or game already over"})
+                return
+
+            server.push_move(game, move)
+            is_over = game["status"] != "started"
+
+        if not is_over:
+            server.schedule_reply(game_id)
+        self.send_json(200, {"ok": True})
+
+    def post_resign(self, game_id):
+        server = self.server
+        with server.condition:
+            game = server.games.get(game_id)
+            if game is None or game["status"] != "started":
+                self.send_json(400, {"error": "Game already over"})
+                return
+            server.end_game(game, "resign", chess.COLOR_NAMES[game["color"] == "black"])
+        self.send_json(200, {"ok": True})
+
+    def get_users_status(self):
+        ids = self.params.get("ids", [""])[0].split(",")
+        users = []
+        for user_id in filter(None, ids):
+            user = {"id": user_id.lower(), "name": user_id}
+            # Offline users only have 'id' and 'name'
+            if self.server.online.get(user_id.lower(), True):
+                user["online"] = True
+            users.append(user)
+        self.send_json(200, users)
+
+    def post_users(self):
+        ids = filter(None, self.body.split(","))
+        self.send_json(
+            200, [{"id": user_id.lower(), "username": user_id} for user_id in ids]
+        )
+
+    def get_user_games(self, username):
+        """ Sends finished games, last first, as ndjson """
+
+        max_games = int(self.params.get("max", [0])[0]) or None
+        with self.server.condition:
+            games = [
+                {"id": game["id"], "status": game["status"], "winner": game["winner"]}
+                for game in reversed(list(self.server.games.values()))
+                if game["status"] != "started"
+            ][:max_games]
+        body = "".join(json.dumps(game) + "\n" for game in games)
+        self.send_body(200, body.encode(), "application/x-ndjson")
+
+    def post_challenge(self, challenge_id, answer):
+        self.send_json(200, {"ok": True})
+
+    def send_json(self, status, obj, headers=None):
+        """ Sends response with given status and json body
+
+        Arguments:
+            status {int} -- HTTP status
+            obj {object} -- Body, serializable to json
+
+        Keyword Arguments:
+            headers {dict} -- Additional headers (default: {None})
+        """
+
+        self.send_body(status, json.dumps(obj).encode(), "application/json", headers)
+
+    def send_body(self, status, body, content_type, headers=None):
+        """ Sends response with given status and body """
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def start_stream(self):
+        """ Sends headers of ndjson stream, in chunks as Lichess does """
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        # Stream ends with the connection
+        self.close_connection = True
+
+    def send_chunk(self, data):
+        """ Sends chunk of stream, an empty one ends it
+
+        Arguments:
+            data {str} -- Chunk data
+        """
+
+        data = data.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        """ Does not log each request """
+
+
+def serve(port, latency, error_rate, rate_429):
+    """ Serves games forever, starting a new one when the last one ends """
+
+    server = MockLichess(
+        port=port,
+        latency=latency,
+        error_rate=error_rate,
+        rate_429=rate_429,
+        reply_delay=1,
+    )
+    Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Mock Lichess listening on {server.base_url}")
+
+    num_games = 0
+    while True:
+        if len(server.get_ongoing()) == 0:
+            num_games += 1
+            game_id = f"mockgame{num_games}"
+            server.add_game(game_id)
+            print(f"Started game {game_id}")
+        time.sleep(1)
+
+
+if __name__ == "__main__":
+    serve(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 8080,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0,
+        float(sys.argv[3]) if len(sys.argv) > 3 else 0,
+        float(sys.argv[4]) if len(sys.argv) > 4 else 0,
+    )
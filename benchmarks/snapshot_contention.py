@@ -0,0 +1,114 @@
+""" Contention benchmark of ongoing games reads
+
+Many reader threads read the ongoing game IDs and games, as BotHandler
+does for every move message and OBS update, while a writer replaces them
+every second, as update_ongoing_games does. Compares the read-only
+snapshots of BotChess with the previous lock + deepcopy reads.
+
+Run from the repository root:
+    python -m benchmarks.snapshot_contention
+"""
+
+import copy as cp
+import time
+from threading import Lock, Thread, Event
+
+from bots.botChess import BotChess
+
+DURATION = 2
+READER_THREADS = [1, 8, 32]
+
+GAMES = [
+    {
+        "gameId": f"game{i}",
+        "fullId": f"game{i}abcd",
+        "color": "white",
+        "fen": "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1",
+        "hasMoved": True,
+        "isMyTurn": False,
+        "lastMove": "e2e4",
+        "opponent": {"id": f"opponent{i}", "rating": 1500, "username": "Opponent"},
+        "perf": "blitz",
+        "rated": False,
+        "secondsLeft": 180,
+        "source": "friend",
+        "speed": "blitz",
+        "variant": {"key": "standard", "name": "Standard"},
+    }
+    for i in range(3)
+]
+
+
+class LegacyGames:
+    """ Previous implementation: dict replaced under lock, deepcopy reads """
+
+    def __init__(self):
+        self.ongoing_games = {}
+        self.lock_ongoing_games = Lock()
+
+    def publish_ongoing_games(self, games):
+        with self.lock_ongoing_games:
+            self.ongoing_games = {}
+            for game in games:
+                self.ongoing_games[game["gameId"]] = game
+
+    def get_ongoing_game_ids(self):
+        with self.lock_ongoing_games:
+            return list(self.ongoing_games.keys())
+
+    def get_ongoing_games(self):
+        with self.lock_ongoing_games:
+            return cp.deepcopy(self.ongoing_games)
+
+
+def current_games():
+    """ Current implementation, without connecting to Lichess """
+
+    return BotChess({"token": "token"}, None, connect=False)
+
+
+def bench(games, num_readers):
+    """ Gets total reads/sec of given games holder with given readers """
+
+    stop = Event()
+    counts = [0] * num_readers
+
+    def reader(i):
+        while not stop.is_set():
+            # Reads ID and color from the same snapshot
+            ongoing_games = games.get_ongoing_games()
+            if len(ongoing_games) > 0:
+                ongoing_games[next(iter(ongoing_games))]["color"]
+            counts[i] += 1
+
+    def writer():
+        while not stop.wait(1):
+            games.publish_ongoing_games(GAMES)
+
+    games.publish_ongoing_games(GAMES)
+    threads = [Thread(target=reader, args=(i,)) for i in range(num_readers)]
+    threads.append(Thread(target=writer))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def main():
+    print("readers | legacy reads/sec | snapshot reads/sec")
+    for num_readers in READER_THREADS:
+        legacy = bench(LegacyGames(), num_readers)
+        current = bench(current_games(), num_readers)
+        print(
+            f"{num_readers:>7} | {legacy:>16,.0f} | {current:>18,.0f}"
+            + f" ({current / legacy:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
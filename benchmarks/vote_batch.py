@@ -0,0 +1,137 @@
+""" Benchmark of batch voting with BotChess.vote_batch
+
+Votes 100k chat moves from 50k users in the initial position, one message
+at a time (has_voted + vote_for_move + set as voted, as BotHandler did
+for each message) and in batches of BATCH_SIZE (the default batch size
+of BotHandler) with vote_batch. Counts lock acquisitions (game states, votes, voters and the
+game state lock) and time per message.
+
+Run from the repository root:
+    python -m benchmarks.vote_batch
+"""
+
+import random
+import time
+from threading import Lock
+
+import chess
+
+from bots.botChess import BotChess
+from bots.voterRegistry import VoterRegistry
+from lib.misc import set_log_level
+
+GAME_ID = "game0"
+NUM_VOTES = 100000
+NUM_USERS = 50000
+BATCH_SIZE = 256
+
+
+class CountingLock:
+    """ Lock that counts how many times it was acquired """
+
+    count = 0
+
+    def __init__(self):
+        self.lock = Lock()
+
+    def acquire(self, *args):
+        CountingLock.count += 1
+        return self.lock.acquire(*args)
+
+    def release(self):
+        self.lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+class VotersHandler:
+    """ Voter methods of BotHandler, which needs the bot configuration """
+
+    def __init__(self):
+        self.voter_registry = VoterRegistry()
+        self.voter_registry.lock = CountingLock()
+
+    def set_user_as_already_voted(self, game_id, user):
+        self.voter_registry.add(game_id, user)
+
+    def set_users_as_already_voted(self, game_id, users):
+        return self.voter_registry.add_many(game_id, users)
+
+    def get_has_user_already_voted(self, game_id, user):
+        return self.voter_registry.has_voted(game_id, user)
+
+    def reset_users_voted_moves(self, game_id):
+        self.voter_registry.reset(game_id)
+
+
+def create_bots():
+    """ Creates voters handler and BotChess with a game in the initial position
+        and our turn, without connecting to Lichess
+    """
+
+    bot_handler = VotersHandler()
+
+    bot_chess = BotChess({"token": "token"}, bot_handler, connect=False)
+    bot_chess.lock_game_move_votes = CountingLock()
+    bot_chess.lock_game_states = CountingLock()
+
+    game_state = bot_chess.adopt_game(GAME_ID, "white")
+    game_state.treat_event(
+        {"type": "gameFull", "state": {"moves": "", "status": "started"}}
+    )
+    game_state.lock = CountingLock()
+
+    return bot_handler, bot_chess
+
+
+def per_message(votes):
+    """ Previous voting: locks taken for each message """
+
+    bot_handler, bot_chess = create_bots()
+    for user, move in votes:
+        if bot_handler.get_has_user_already_voted(GAME_ID, user):
+            continue
+        if bot_chess.vote_for_move(GAME_ID, move):
+            bot_handler.set_user_as_already_voted(GAME_ID, user)
+    return bot_chess.game_move_votes[GAME_ID].get_total()
+
+
+def batched(votes):
+    """ Current voting: locks taken for each batch """
+
+    bot_handler, bot_chess = create_bots()
+    for i in range(0, len(votes), BATCH_SIZE):
+        bot_chess.vote_batch(GAME_ID, votes[i : i + BATCH_SIZE])
+    return bot_chess.game_move_votes[GAME_ID].get_total()
+
+
+def main():
+    random.seed(0)
+    # Each vote is logged as DEBUG
+    set_log_level("INFO")
+
+    board = chess.Board()
+    moves = [board.san(move) for move in board.legal_moves]
+    moves += [move.uci() for move in board.legal_moves]
+    users = [f"user{i}" for i in range(NUM_USERS)]
+    votes = [(random.choice(users), random.choice(moves)) for _ in range(NUM_VOTES)]
+
+    print("voting      | counted | lock acquisitions | per message (us)")
+    for name, vote in [("per message", per_message), ("batched", batched)]:
+        CountingLock.count = 0
+        start = time.perf_counter()
+        total = vote(votes)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:<11} | {total:>7,} | {CountingLock.count:>17,}"
+            + f" | {elapsed / NUM_VOTES * 1e6:>16.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
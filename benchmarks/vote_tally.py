@@ -0,0 +1,163 @@
+""" Benchmark of vote tallying with MoveVotes
+
+Feeds 100k votes/sec from 50k distinct users (one vote per user per turn,
+as BotHandler allows) and queries the tally twice per second, as
+BotChess.handle_game_moves does when votes arrive (top move and resign
+ratio). Each second is a new turn, whose tallies start empty. Compares with the previous tally, a dict
+of move strings to counts rebuilt with list(keys()) and summed at each
+query.
+
+Per-vote add is slower than the dict increment it replaces (a NumPy scalar
+update costs more than a dict one), queries cost about the same at this
+size, and batched add_many (as vote_batch) is the fastest. The averages
+printed at the end show it.
+
+Run from the repository root:
+    python -m benchmarks.vote_tally
+"""
+
+import random
+import statistics
+import time
+
+import chess
+
+from bots.moveVotes import MoveVotes
+
+VOTES_PER_SEC = 100000
+NUM_USERS = 50000
+SECONDS = 5
+QUERIES_PER_SEC = 2
+
+
+def legacy_query(votes):
+    """ Previous tally query: most voted move and resign ratio """
+
+    moves = list(votes.keys())
+    total_votes = sum([votes[m] for m in moves])
+    resign_ratio = votes.get("resign", 0) / total_votes
+    return max(moves, key=votes.get), resign_ratio
+
+
+def current_query(votes):
+    """ Current tally query: most voted move and resign ratio """
+
+    return votes.get_top_moves(1), votes.get_resign_ratio()
+
+
+def print_times(second, legacy_add, legacy_query, add, query, add_many):
+    """ Prints times (seconds) of a second as a table row """
+
+    print(
+        f"{second:>6}"
+        + f" | {legacy_add * 1e6:>10,.0f} / {legacy_query * 1e6:>8,.1f}"
+        + f" | {add * 1e6:>11,.0f} / {query * 1e6:>8,.1f}"
+        + f" | {add_many * 1e6:>21,.0f}"
+    )
+
+
+def main():
+    random.seed(0)
+
+    # Votes spread over the legal moves of the initial position and resign
+    moves = [MoveVotes.encode_move(move) for move in chess.Board().legal_moves]
+    moves.append(MoveVotes.RESIGN_KEY)
+    move_strs = {key: MoveVotes.decode_move(key).uci() for key in moves}
+    move_strs[MoveVotes.RESIGN_KEY] = "resign"
+
+    users = [f"user{i}" for i in range(NUM_USERS)]
+
+    current_votes = MoveVotes()
+    batch_votes = MoveVotes()
+
+    # Times (seconds) of each second, as {name: [time]}
+    times = {
+        name: [] for name in ("legacy add", "legacy query", "add", "query", "add_many")
+    }
+
+    print(
+        "second | legacy add / query (us) | current add / query (us)"
+        + " | current add_many (us)"
+    )
+    for second in range(1, SECONDS + 1):
+        # A new turn every second, so users can vote again and tallies start
+        # empty
+        legacy_votes = {}
+        current_votes.clear()
+        batch_votes.clear()
+        voted = set()
+        batch = [
+            (random.choice(users), random.choice(moves)) for _ in range(VOTES_PER_SEC)
+        ]
+
+        start = time.perf_counter()
+        for user, key in batch:
+            if user in voted:
+                continue
+            voted.add(user)
+            move = move_strs[key]
+            legacy_votes[move] = legacy_votes.get(move, 0) + 1
+        legacy_add = time.perf_counter() - start
+
+        voted = set()
+        start = time.perf_counter()
+        for user, key in batch:
+            if user in voted:
+                continue
+            voted.add(user)
+            current_votes.add(key)
+        current_add = time.perf_counter() - start
+
+        voted = set()
+        start = time.perf_counter()
+        keys = []
+        for user, key in batch:
+            if user in voted:
+                continue
+            voted.add(user)
+            keys.append(key)
+        batch_votes.add_many(keys)
+        batch_add = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(QUERIES_PER_SEC):
+            legacy_query(legacy_votes)
+        legacy_query_time = (time.perf_counter() - start) / QUERIES_PER_SEC
+
+        start = time.perf_counter()
+        for _ in range(QUERIES_PER_SEC):
+            current_query(current_votes)
+        current_query_time = (time.perf_counter() - start) / QUERIES_PER_SEC
+
+        print_times(
+            second,
+            legacy_add,
+            legacy_query_time,
+            current_add,
+            current_query_time,
+            batch_add,
+        )
+        for name, value in zip(
+            times.keys(),
+            (legacy_add, legacy_query_time, current_add, current_query_time, batch_add),
+        ):
+            times[name].append(value)
+
+    averages = {name: statistics.mean(values) for name, values in times.items()}
+    print_times("avg", *averages.values())
+    print(
+        f"\nPer-vote add: {averages['add'] / averages['legacy add']:.2f}x the time"
+        + " of the legacy dict"
+    )
+    print(
+        f"Query: {averages['query'] / averages['legacy query']:.2f}x the time"
+        + " of the legacy dict"
+    )
+    print(
+        f"Batched add_many: {averages['add_many'] / averages['legacy add']:.2f}x"
+        + " the time of the legacy dict"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,61 @@
 import time
 from threading import Thread, Lock
-import copy as cp
 
-import requests
 import chess
 import re
 import berserk
 
-from lib.misc import print_debug
+from bots.gameState import GameState
+from bots.gameWorkerPool import GameWorkerPool
+from bots.lichessSession import LichessSession
+from bots.moveVotes import MoveVotes
+from bots.presenceCache import PresenceCache
+from lib.misc import print_debug, freeze
+from lib.scheduler import Scheduler
 
 
 class BotChess:
 
     UCI_PATTERN = re.compile("[a-h][1-8][a-h][1-8]")
-    RESIGN_MOVE_STR = "resign"
     MIN_RESIGN_VOTES = 1
     MIN_RESIGN_PERCENTAGE_VOTES = 0.1
-
-    def __init__(self, config, bot_handler, mode="anarchy"):
+    # Default duration (seconds) of democracy voting window
+    DEMOCRACY_WINDOW = 15
+    # Interval (seconds) to refresh online status of opponents
+    PRESENCE_INTERVAL = 5
+    # Time (seconds) an opponent status is trusted after refreshed
+    PRESENCE_TTL = 15
+    # Interval (seconds) to update ongoing games
+    ONGOING_GAMES_INTERVAL = 1
+    # Interval (seconds) to handle ongoing games (start following them, resign)
+    GAMES_HANDLER_INTERVAL = 0.5
+    # Default number of threads making moves, shared by all games
+    GAME_WORKERS = 4
+    # Minimum length of game ID prefix to select a game in votes
+    MIN_GAME_PREFIX = 4
+    # Default Lichess API address
+    BASE_URL = "https://lichess.org"
+
+    def __init__(
+        self, config, bot_handler, mode="anarchy", scheduler=None, connect=True
+    ):
         """ BotChess constructor
         
         Arguments:
-            config {dict} -- Lichess API configuration ('token')
+            config {dict} -- Lichess API configuration ('token' and
+                optionally 'democracy' and 'base_url')
             bot_handler {BotHandler} -- Bot Handler to inform when a 
                 move is made.
         
         Keyword Arguments:
-            mode {str} -- Mode to process game move votes 
-                (default: {'anarchy'})
+            mode {str} -- Mode to process game move votes, 'anarchy' (moves
+                as soon as there are votes) or 'democracy' (moves when the
+                voting window closes) (default: {'anarchy'})
+            scheduler {Scheduler} -- Scheduler to run periodic jobs in
+                (default: {None}, a new one is started)
+            connect {bool} -- Connects to Lichess API and starts handling
+                games. Otherwise, only votes are handled, until started (see
+                start) (default: {True})
         
         Raises:
             Exception: Unable to connect to Lichess API
@@ -37,14 +65,47 @@ class BotChess:
         self.mode = mode
         self.bot_handler = bot_handler
 
-        self.ongoing_games = {}
-        self.lock_ongoing_games = Lock()
+        # Democracy voting window duration (seconds) and number of votes
+        # that closes it earlier (0 to always wait the whole window)
+        democracy_config = config.get("democracy", {})
+        self.democracy_window = democracy_config.get(
+            "window", BotChess.DEMOCRACY_WINDOW
+        )
+        self.democracy_max_votes = democracy_config.get("max_votes", 0)
+
+        # Snapshot of ongoing games, as read-only {game_id: game}. It is
+        # replaced (never modified) when updated, so it is read without lock.
+        # IDs are taken from it, so they always match the games
+        self.ongoing_games = freeze({})
 
+        # Votes of current turn of each game, as {game_id: MoveVotes}
         self.game_move_votes = {}
         self.lock_game_move_votes = Lock()
 
-        self.thread_games = []
-        self.lock_thread_games = Lock()
+        # Live state of each game being handled, as {game_id: GameState}
+        self.game_states = {}
+        # Games that finished, while they are still listed as ongoing, so
+        # they are not handled (and their result counted) again
+        self.finished_game_ids = set()
+        self.lock_game_states = Lock()
+
+        # Threads that make moves in games that have changed
+        self.game_workers = GameWorkerPool(
+            config.get("game_workers", BotChess.GAME_WORKERS), self.handle_game_moves
+        )
+
+        self.scheduler = scheduler
+
+        if connect:
+            self.start()
+
+    def start(self):
+        """ Connects to Lichess API and starts handling games: periodic jobs,
+            incoming events and game workers
+
+        Raises:
+            Exception: Unable to connect to Lichess API
+        """
 
         ret = self.start_session()
         if not ret:
@@ -52,10 +113,29 @@ class BotChess:
                 "Unable to connect to lichess API. Check your personal token"
             )
 
-        # Start threads
-        self.start_thread(self.thread_update_ongoing_games)
-        self.start_thread(self.thread_games_handler)
+        # Online status of opponents in ongoing games
+        self.presence = PresenceCache(self.client, BotChess.PRESENCE_TTL)
+
+        if self.scheduler is None:
+            self.scheduler = Scheduler().start()
+        # Schedule periodic jobs. They make Lichess requests, so they run in
+        # scheduler workers and do not delay other deadlines
+        self.scheduler.every(
+            BotChess.ONGOING_GAMES_INTERVAL, self.update_ongoing_games, blocking=True
+        )
+        self.scheduler.every(
+            BotChess.PRESENCE_INTERVAL, self.update_presence, blocking=True
+        )
+        self.scheduler.every(
+            BotChess.GAMES_HANDLER_INTERVAL,
+            self.handle_games,
+            delay=BotChess.GAMES_HANDLER_INTERVAL,
+            blocking=True,
+        )
+
+        # Starts following incoming events (challenges, game starts)
         self.start_thread(self.thread_treat_incoming_events)
+        self.game_workers.start()
 
     def start_thread(self, thread_func, daemon=True, args=()):
         """ Starts new thread
@@ -87,127 +167,223 @@ class BotChess:
             except Exception as e:
                 print_debug(f"Exception in incoming events. Exception: {e}", "ERROR")
 
-    def thread_update_ongoing_games(self):
-        """ Thread to update ongoing games """
-        while True:
-            self.update_ongoing_games()
-            time.sleep(1)
+    def update_presence(self):
+        """ Updates online status of opponents in ongoing games """
+
+        # Opponents without ID are the computer
+        opponent_ids = [
+            game["opponent"]["id"]
+            for game in self.ongoing_games.values()
+            if game["opponent"].get("id") is not None
+        ]
+        self.presence.refresh(opponent_ids)
+
+    def handle_games(self):
+        """ Handles ongoing games (start following new ones, resign, etc.) """
+
+        ongoing_games = self.ongoing_games
+        for game_id in ongoing_games.keys():
+            # Starts handling game if not started yet (nor finished)
+            if game_id not in self.game_states:
+                # Creates live state of game and starts following it
+                game_state = self.adopt_game(game_id, ongoing_games[game_id]["color"])
+                if game_state is None:
+                    continue
+                self.start_thread(self.thread_game_state_stream, args=(game_id,))
+
+            # Gets opponent ID
+            player_id = ongoing_games[game_id]["opponent"]["id"]
+            # If ID is none, probably is playing against the computer
+            if player_id is None:
+                continue
 
-    def thread_games_handler(self):
-        """ Thread to handle ongoing games 
-            (resign, start other threads, etc.)
+            # If opponent player is not online, resigns. Unknown status
+            # (not refreshed yet or unable to get it) is not offline
+            if self.presence.is_online(player_id) is False:
+                print_debug(f"Opponent {player_id} offline." + " Resigning", "DEBUG")
+                self.resign_game(game_id)
+
+    def adopt_game(self, game_id, color):
+        """ Starts handling given game, creating its live state, whose changes
+            are handled by the game workers. It is given the lowest free board
+            number
+
+        Arguments:
+            game_id {str} -- Game ID in Lichess
+            color {str} -- Our color in the game ('white' or 'black')
+
+        Returns:
+            GameState or None -- Live state of game or None if the game has
+                already finished
         """
 
-        while True:
-            time.sleep(0.5)
-
-            with (self.lock_ongoing_games):
-                for game_id in self.ongoing_games.keys():
-                    # Add thread to treat moves if not started yet
-                    if game_id not in self.thread_games:
-                        # Adds game_id to ongoing game_ids threads
-                        with (self.lock_thread_games):
-                            self.thread_games.append(game_id)
-                        # Starts thread to handle moves for game_id
-                        self.start_thread(
-                            self.thread_make_move_handler, args=(game_id,)
-                        )
-
-                    # Gets opponent ID
-                    player_id = self.ongoing_games[game_id]["opponent"]["id"]
-                    # If ID is none, probably is playing against the computer
-                    if player_id is None:
-                        continue
-
-                    try:
-                        # Gets opponent player information
-                        player = self.client.users.get_by_id(player_id)
-
-                        # If opponent player is not online, resigns
-                        if not player[0]["online"]:
-                            print_debug(
-                                f"Opponent {player_id} offline." + " Resigning", "DEBUG"
-                            )
-                            self.resign_game(game_id)
-
-                    except Exception as e:
-                        print_debug(
-                            f"Unable to get player {player_id}." + f" Exception: {e}"
-                        )
-
-    def thread_make_move_handler(self, game_id):
-        """ Handle move votes and makes moves in game with given ID
+        with self.lock_game_states:
+            if game_id in self.finished_game_ids:
+                return None
+            game_state = GameState(
+                game_id, color, self.game_workers.submit, self.get_free_board_number()
+            )
+            self.game_states[game_id] = game_state
+            return game_state
+
+    def thread_game_state_stream(self, game_id):
+        """ Follows state stream of game with given ID, updating its
+            GameState move by move until the game ends
 
         Arguments:
             game_id {str} -- Game ID in Lichess
         """
 
-        while True:  # Runs ultil game has ended
-            time.sleep(0.5)
+        game_state = self.get_game_state(game_id)
+        if game_state is None:
+            return
 
-            # If game has ended, stops while(True)
-            with (self.lock_ongoing_games):
-                if game_id not in self.ongoing_games.keys():
-                    break
+        while not game_state.is_over():
+            # If game stopped being handled, finishes the thread
+            if self.get_game_state(game_id) is not game_state:
+                return
 
-            with (self.lock_game_move_votes):
-                # If move votes weren't created yet
-                if game_id not in self.game_move_votes.keys():
-                    continue
+            try:
+                for event in self.client.bots.stream_game_state(game_id):
+                    game_state.treat_event(event)
+            except Exception as e:
+                print_debug(
+                    f"Exception in game {game_id} stream. Exception: {e}", "ERROR"
+                )
+                time.sleep(1)
 
-                # Gets list of voted moves
-                moves = list(self.game_move_votes[game_id].keys())
-                if len(moves) == 0:
-                    continue
+        # Informs the result, so W-D-L is updated without polling
+        result = game_state.get_result()
+        if result is not None:
+            self.bot_handler.treat_game_result(game_id, result)
+
+    def handle_game_moves(self, game_id):
+        """ Handles move votes and makes moves in game with given ID. Runs in
+            a game worker when the game changes (moves, votes, end) or when
+            the democracy voting window closes
+
+        Arguments:
+            game_id {str} -- Game ID in Lichess
+        """
 
-                # Treats resign move vote
-                if BotChess.RESIGN_MOVE_STR in moves:
-                    # Get total number of votes
-                    total_votes = sum([self.game_move_votes[game_id][m] for m in moves])
-                    # Get number of resign votes
-                    resign_votes = self.game_move_votes[game_id][
-                        BotChess.RESIGN_MOVE_STR
-                    ]
-                    # If there is more than the minimum resign votes and
-                    # the percentage of resign votes is more than required,
-                    # resigns the game
-                    if (
-                        total_votes >= BotChess.MIN_RESIGN_VOTES
-                        and resign_votes / total_votes
-                        >= BotChess.MIN_RESIGN_PERCENTAGE_VOTES
-                    ):
-                        self.resign_game(game_id)
-
-                # Performs "random" voted move if mode is anarchy
-                if self.mode == "anarchy":
-                    move = moves[0]
-
-                    # If the move chosen was to resign, but there is more than
-                    # one move to choose, pick another
-                    if move == BotChess.RESIGN_MOVE_STR:
-                        if len(moves) >= 2:
-                            move = moves[1]
-                        else:  # If there is only resign move, continues
-                            continue
-
-                    # Makes move
-                    ret = self.make_move(game_id, move)
-
-                    if ret:  # remove all votes if succeeded
-                        self.game_move_votes[game_id] = {}
-                    else:  # remove move if not succeeded
-                        del self.game_move_votes[game_id][move]
-
-                # TODO: Democracy mode
-
-                # Resets the users that voted for a move in this game
-                # because if it gets to here, a move was made or at least tried
-                self.bot_handler.reset_users_voted_moves(game_id)
-
-        # Removes game from thread_games and finishes the thread
-        with (self.lock_thread_games):
-            self.thread_games.remove(game_id)
-        print_debug(f"Finished game {game_id}", "DEBUG")
+        game_state = self.get_game_state(game_id)
+        if game_state is None:
+            return
+
+        # If game has ended, stops handling it
+        if game_state.is_over() or game_id not in self.ongoing_games:
+            self.finish_game(game_id)
+            return
+
+        # Moves are only made in our turn
+        if not game_state.is_my_turn():
+            return
+
+        # Decides what to do under the lock, but makes the Lichess request
+        # without it, so votes of other games are not blocked meanwhile
+        ply = game_state.get_ply()
+        with self.lock_game_move_votes:
+            self.open_voting_window(game_state, ply)
+
+            # If move votes weren't created yet
+            votes = self.game_move_votes.get(game_id)
+            if votes is None:
+                return
+
+            # Gets total number of votes
+            total_votes = votes.get_total()
+            if total_votes == 0:
+                return
+
+            # Treats resign move vote
+            # If there is more than the minimum resign votes and
+            # the percentage of resign votes is more than required,
+            # resigns the game
+            resign = (
+                votes.get_resign_votes() > 0
+                and total_votes >= BotChess.MIN_RESIGN_VOTES
+                and votes.get_resign_ratio() >= BotChess.MIN_RESIGN_PERCENTAGE_VOTES
+            )
+
+            # In democracy mode, waits until voting window closes, which
+            # happens at its deadline or when enough votes were made
+            move_key = None
+            if self.mode != "democracy" or (
+                time.monotonic() >= game_state.window_deadline
+                or 0 < self.democracy_max_votes <= total_votes
+            ):
+                # Performs most voted move. In anarchy mode, as soon as
+                # there are votes
+                top_moves = votes.get_top_moves(1)
+
+                # If there is only resign move, no move is made
+                if len(top_moves) > 0:
+                    move_key = top_moves[0][0]
+
+        if resign:
+            self.resign_game(game_id)
+
+        if move_key is None:
+            return
+
+        # Makes move. Votes are not accepted until the stream gets it
+        ret = self.make_move(game_id, MoveVotes.decode_move(move_key))
+        if ret:
+            game_state.set_move_pending(ply)
+
+        with self.lock_game_move_votes:
+            # Votes may have been replaced meanwhile (game restarted)
+            if self.game_move_votes.get(game_id) is votes:
+                if ret:  # remove all votes if succeeded
+                    votes.clear()
+                else:  # remove move if not succeeded
+                    votes.remove(move_key)
+
+            # Resets the users that voted for a move in this game
+            # because if it gets to here, a move was made or at least tried
+            self.bot_handler.reset_users_voted_moves(game_id)
+
+        # Tries next most voted move
+        if not ret:
+            game_state.notify_change()
+
+    def open_voting_window(self, game_state, ply):
+        """ Opens voting window of given game when a new turn starts,
+            forgetting votes and voters of previous positions. In democracy
+            mode, the game is handled again when it closes. Must be called
+            with lock_game_move_votes held
+
+        Arguments:
+            game_state {GameState} -- Live state of game
+            ply {int} -- Ply of the current turn (see GameState.get_ply)
+        """
+
+        if ply == game_state.window_ply:
+            return
+
+        game_state.window_ply = ply
+        game_state.window_deadline = time.monotonic() + self.democracy_window
+
+        votes = self.game_move_votes.get(game_state.game_id)
+        if votes is not None:
+            votes.clear()
+        self.bot_handler.reset_users_voted_moves(game_state.game_id)
+
+        if self.mode == "democracy":
+            self.scheduler.call_after(self.democracy_window, game_state.notify_change)
+
+    def finish_game(self, game_id):
+        """ Stops handling game with given ID
+
+        Arguments:
+            game_id {str} -- Game ID in Lichess
+        """
+
+        with self.lock_game_states:
+            if self.game_states.pop(game_id, None) is not None:
+                print_debug(f"Finished game {game_id}", "DEBUG")
+            # Lichess may still list it as ongoing for a while
+            self.finished_game_ids.add(game_id)
 
     def treat_incoming_event(self, event):
         """ Treats an incoming event from Lichess API
@@ -248,8 +424,7 @@ class BotChess:
 
         # The event must be a challenge, must not be rated and
         # there must be no games going on
-        with self.lock_ongoing_games:
-            ret = len(self.ongoing_games) == 0
+        ret = len(self.ongoing_games) == 0
         ret = ret and event["type"] == "challenge" and (not event["challenge"]["rated"])
 
         return ret
@@ -280,16 +455,18 @@ class BotChess:
         """
 
         with (self.lock_game_move_votes):
-            # Creates dict of voted moves for game, if it does not exists
+            # Creates votes for game, if they do not exist
             if game_id not in self.game_move_votes.keys():
-                self.game_move_votes[game_id] = dict()
-            # Creates 'resign' move for game_id, if it does not exists
-            if BotChess.RESIGN_MOVE_STR not in self.game_move_votes[game_id].keys():
-                self.game_move_votes[game_id][BotChess.RESIGN_MOVE_STR] = 0
+                self.game_move_votes[game_id] = MoveVotes()
             # Votes for resign
-            self.game_move_votes[game_id][BotChess.RESIGN_MOVE_STR] += 1
+            self.game_move_votes[game_id].add(MoveVotes.RESIGN_KEY)
+
+            print_debug("Voted for resign in game {}", "DEBUG", game_id)
 
-            print_debug(f"Voted for resign in game {game_id}", "DEBUG")
+        # Submits game to the game workers, which make its moves
+        game_state = self.get_game_state(game_id)
+        if game_state is not None:
+            game_state.notify_change()
 
         return True
 
@@ -298,53 +475,110 @@ class BotChess:
         
         Arguments:
             game_id {str} -- Game ID in Lichess
-            move {str} -- Move in UCI or SAN
+            move {str} -- Move in UCI or SAN (see GameState.build_move_index)
         
         Returns:
             bool -- True in case of success, False otherwise
         """
 
+        # Votes are only accepted in our turn, for the current position
+        game_state = self.get_game_state(game_id)
+        if game_state is None or not game_state.is_my_turn():
+            print_debug(
+                "Unable to vote for {} in game {}. Not our turn.",
+                "DEBUG",
+                move,
+                game_id,
+            )
+            return False
+        ply = game_state.get_ply()
+
+        # Gets the legal move voted for (as key), so every spelling of a move
+        # counts for the same move
+        move_key = game_state.get_move_key(move)
+        if move_key is None:
+            print_debug(
+                "Unable to vote for {} in game {}. Illegal move.",
+                "DEBUG",
+                move,
+                game_id,
+            )
+            return False
+
         with (self.lock_game_move_votes):
-            # Validates move
-            if not self.get_is_move_fmt_valid(move):
+            # Votes of previous positions are forgotten when turn starts
+            self.open_voting_window(game_state, ply)
+            # Creates votes for game, if they do not exist
+            if game_id not in self.game_move_votes.keys():
+                self.game_move_votes[game_id] = MoveVotes()
+            # Votes for move
+            self.game_move_votes[game_id].add(move_key)
+
+        print_debug("Voted for {} in game {}", "DEBUG", move, game_id)
+        # Submits game to the game workers, which make its moves
+        game_state.notify_change()
+        return True
+
+    def vote_batch(self, game_id, votes):
+        """ Votes for given moves in given game, each one by the user that
+            sent it. Users that already voted in this turn, repeated users
+            (first vote counts) and illegal moves are skipped. Locks are
+            taken once for the whole batch
+
+        Arguments:
+            game_id {str} -- Game ID in Lichess
+            votes {list(tuple)} -- Votes as (user, move), move in UCI or SAN
+                (see GameState.build_move_index)
+
+        Returns:
+            int -- Number of votes counted
+        """
+
+        # Votes are only accepted in our turn, for the current position
+        game_state = self.get_game_state(game_id)
+        if game_state is None or not game_state.is_my_turn():
+            print_debug("Unable to vote in game {}. Not our turn.", "DEBUG", game_id)
+            return 0
+        ply = game_state.get_ply()
+
+        # Gets the legal moves voted for (as keys), so every spelling of a
+        # move counts for the same move
+        users = []
+        move_keys = []
+        for user, move in votes:
+            move_key = game_state.get_move_key(move)
+            if move_key is None:
                 print_debug(
-                    f"Unable to vote for {move} in game {game_id}. "
-                    + "Invalid format.",
+                    "Unable to vote for {} in game {}. Illegal move.",
                     "DEBUG",
+                    move,
+                    game_id,
                 )
-                return False
-
-            # Parse from SAN to UCI if necessary
-            if not self.get_is_uci(move):
-                # Gets game current board (position)
-                board = self.get_board_from_game(game_id)
-                if board is None:
-                    print_debug(
-                        f"Unable to get board from {game_id}. " + "Unable to make move",
-                        "ERROR",
-                    )
-                try:
-                    # Tries to make move, if not succeeded, move is invalid.
-                    move = board.parse_san(move)
-                except Exception as e:
-                    print_debug(
-                        f"Unable to vote for {move} in game "
-                        f"{game_id}. Exception: {e}",
-                        "DEBUG",
-                    )
-                    return False
-
-            # Creates dict of voted moves for game, if it does not exists
+                continue
+            users.append(user)
+            move_keys.append(move_key)
+
+        with self.lock_game_move_votes:
+            # Votes and voters of previous positions are forgotten when turn
+            # starts, before the voters of this batch are set
+            self.open_voting_window(game_state, ply)
+
+            # Only counts the first vote of each user in this turn
+            is_new = self.bot_handler.set_users_as_already_voted(game_id, users)
+            move_keys = [key for key, new in zip(move_keys, is_new) if new]
+            if len(move_keys) == 0:
+                return 0
+
+            # Creates votes for game, if they do not exist
             if game_id not in self.game_move_votes.keys():
-                self.game_move_votes[game_id] = dict()
-            # Add move to list of voted moves, if not voted yet
-            if move not in self.game_move_votes[game_id].keys():
-                self.game_move_votes[game_id][move] = 0
-            # Votes for move
-            self.game_move_votes[game_id][move] += 1
+                self.game_move_votes[game_id] = MoveVotes()
+            # Votes for moves
+            self.game_move_votes[game_id].add_many(move_keys)
 
-        print_debug(f"Voted for {move} in game {game_id}", "DEBUG")
-        return True
+        print_debug("Voted for {} moves in game {}", "DEBUG", len(move_keys), game_id)
+        # Submits game to the game workers, which make its moves
+        game_state.notify_change()
+        return len(move_keys)
 
     def start_session(self):
         """ Starts session with Lichess API
@@ -354,10 +588,18 @@ class BotChess:
         """
 
         try:
-            # Stablish session
-            self.session = berserk.TokenSession(self.config["token"])
-            # Stablish client
-            self.client = berserk.Client(self.session)
+            # Stablish session, shared by all threads and requests
+            rate_limit = self.config.get("rate_limit", {})
+            self.session = LichessSession(
+                self.config["token"],
+                rate=rate_limit.get("rate", LichessSession.RATE),
+                burst=rate_limit.get("burst", LichessSession.BURST),
+                reserve=rate_limit.get("reserve", LichessSession.RESERVE),
+            )
+            # Stablish client, with Lichess or other API address (as a
+            # local mock, see benchmarks/mock_lichess.py)
+            self.base_url = self.config.get("base_url", BotChess.BASE_URL)
+            self.client = berserk.Client(self.session, base_url=self.base_url)
             return True
         except Exception as e:
             print_debug(f"Unable to stablish session\nException: {e}", "EXCEPTION")
@@ -387,23 +629,30 @@ class BotChess:
             move = re.findall(r"[a-h][1-8][a-h][1-8]", message)
         else:
             # Gets any first word
-            move = re.findall(r"[a-zA-Z0-9#+!?\-]+", message)
+            move = re.findall(r"[a-zA-Z0-9#+!?=\-]+", message)
         if len(move) == 0:
             return None
 
         return move[0]
 
     def make_move(self, game_id, move):
-        """ Makes given move in given game
+        """ Makes given move in given game, if it is legal in the current
+            position
 
         Arguments:
             game_id {str} -- Game ID in Lichess
-            move {str} -- Move in UCI
+            move {str or chess.Move} -- Move in UCI
 
         Returns:
             bool -- True in case of success, False otherwise
         """
 
+        # Checks move in live board, so no request is made for illegal moves
+        board = self.get_board_from_game(game_id)
+        if board is None or chess.Move.from_uci(str(move)) not in board.legal_moves:
+            print_debug(f"Move {move} is not legal in game {game_id}", "DEBUG")
+            return False
+
         try:
             # Must recieve an UCI
             self.client.bots.make_move(game_id, move)
@@ -415,24 +664,6 @@ class BotChess:
             )
             return False
 
-    def get_is_move_fmt_valid(self, move):
-        """ Check if move string format is valid
-
-        Arguments:
-            move {str} -- Move string
-
-        Returns:
-            bool -- True if move format is valid, False otherwise
-        """
-
-        # If move is UCI, considers valid
-        if not self.get_is_uci(move):
-            # Tries to parse SAN move
-            # PROBLEMS WITH CASTLING (0-0-0, 0-0)
-            if chess.SAN_REGEX.match(move) is None:
-                return False
-        return True
-
     def update_ongoing_games(self):
         """ Update ongoing games given by Lichess API """
 
@@ -445,13 +676,34 @@ class BotChess:
             print_debug(f"Unable to get ongoing games. Exception: {e}", "EXCEPTION")
             return
 
-        with self.lock_ongoing_games:
-            # First empty the dict of ongoing games
-            self.ongoing_games = {}
-            # Gets ongoing games
-            # Add all games to ongoing games dictionary
-            for game in games:
-                self.ongoing_games[game["gameId"]] = game
+        self.publish_ongoing_games(games)
+        ongoing_game_ids = set(self.ongoing_games.keys())
+
+        # Submits games that are not ongoing anymore to the game workers, so
+        # they are finished, and forgets finished games once they are not
+        # listed anymore
+        with self.lock_game_states:
+            for game_id, game_state in self.game_states.items():
+                if game_id not in ongoing_game_ids:
+                    game_state.notify_change()
+            self.finished_game_ids &= ongoing_game_ids
+
+        # Forgets votes and voters of games that are not ongoing anymore
+        with self.lock_game_move_votes:
+            for game_id in list(self.game_move_votes.keys()):
+                if game_id not in ongoing_game_ids:
+                    del self.game_move_votes[game_id]
+        self.bot_handler.evict_finished_games(ongoing_game_ids)
+
+    def publish_ongoing_games(self, games):
+        """ Replaces snapshot of ongoing games with given games
+
+        Arguments:
+            games {list(dict)} -- Ongoing games given by Lichess API
+        """
+
+        # Single assignment, so readers get either the old or the new games
+        self.ongoing_games = freeze({game["gameId"]: game for game in games})
 
     def create_challenge(self, username, rated=False, clock_sec=180, clock_incr_sec=2):
         """ Creates challenge against user with given parameters
@@ -485,14 +737,13 @@ class BotChess:
 
         try:
             # Tries to seek game. Unable to do so using BOT accounts :(
-            r = requests.post(
-                "http://www.lichess.org/api/board/seek",
+            r = self.session.post(
+                self.base_url + "/api/board/seek",
                 params={
                     "rated": str(rated),
                     "time": clock_min,
                     "incremet": clock_incr_sec,
                 },
-                headers={"Authorization": "Bearer " + self.config["token"]},
             )
             print(r.text)
         except Exception as e:
@@ -508,9 +759,10 @@ class BotChess:
             bool -- True if it is my turn, False otherwise
         """
 
-        with self.lock_ongoing_games:
-            if game_id in self.ongoing_games.keys():
-                return self.ongoing_games[game_id]["isMyTurn"]
+        game_state = self.get_game_state(game_id)
+        if game_state is None:
+            return False
+        return game_state.is_my_turn()
 
     def resign_game(self, game_id):
         """ Resign in given game
@@ -531,24 +783,23 @@ class BotChess:
             return False
 
     def get_ongoing_game_ids(self):
-        """ Get list of ongoing game IDs
+        """ Get ongoing game IDs
         
         Returns:
-            list -- List of ongoing game IDs
+            tuple -- Snapshot of ongoing game IDs
         """
 
-        with self.lock_ongoing_games:
-            return list(self.ongoing_games.keys())
+        return tuple(self.ongoing_games.keys())
 
     def get_ongoing_games(self):
-        """ Get dictionary of ongoing games
+        """ Get ongoing games
         
         Returns:
-            dict -- Dictionary of ongoing games
+            MappingProxyType -- Read-only snapshot of ongoing games, as
+                {game_id: game}
         """
 
-        with self.lock_ongoing_games:
-            return cp.deepcopy(self.ongoing_games)
+        return self.ongoing_games
 
     def get_color_in_ongoing_game(self, game_id):
         """ Gets color in given ongoing game
@@ -561,9 +812,9 @@ class BotChess:
                 game is not ongoing
         """
 
-        with self.lock_ongoing_games:
-            if game_id in self.ongoing_games.keys():
-                return self.ongoing_games[game_id]["color"]
+        game = self.ongoing_games.get(game_id)
+        if game is not None:
+            return game["color"]
         return None
 
     def get_id_last_game_played(self):
@@ -585,29 +836,95 @@ class BotChess:
             game_id {str} -- Game ID in Lichess
         
         Returns:
-            chess.Board or None -- Game board in case of success, 
-                None otherwise
+            chess.Board or None -- Copy of live game board in case of
+                success, None otherwise
+        """
+
+        game_state = self.get_game_state(game_id)
+        if game_state is None:
+            return None
+        return game_state.get_board()
+
+    def get_free_board_number(self):
+        """ Gets lowest board number not used by a game being handled. Must
+            be called with lock_game_states held
+
+        Returns:
+            int -- Board number (board 1 is the first)
+        """
+
+        board_numbers = {
+            game_state.board_number for game_state in self.game_states.values()
+        }
+        board_number = 1
+        while board_number in board_numbers:
+            board_number += 1
+        return board_number
+
+    def get_board_games(self):
+        """ Gets games being handled, in order of board number. Each game
+            keeps the board number given when it started being handled, so
+            boards do not shift when other games finish
+
+        Returns:
+            tuple -- Games as (game_id, GameState), in board order
+        """
+
+        with self.lock_game_states:
+            games = tuple(self.game_states.items())
+        return tuple(sorted(games, key=lambda game: game[1].board_number))
+
+    def get_vote_game_id(self, games, move=None, selector=None):
+        """ Gets game a vote is for. Votes can select the game by board
+            number ('2' or '#2') or game ID prefix. Otherwise, they are for
+            the first board in our turn where the move is legal
+
+        Arguments:
+            games {tuple} -- Games as (game_id, GameState), in board order
+                (see get_board_games)
+
+        Keyword Arguments:
+            move {str} -- Move voted for, None for any move (as resign)
+                (default: {None})
+            selector {str} -- Board number or game ID prefix
+                (default: {None}, game is chosen automatically)
+
+        Returns:
+            str or None -- Game ID or None if no game matches
         """
 
-        with (self.lock_ongoing_games):
-            # Check if game exists
-            if game_id in self.ongoing_games.keys():
-                # Gets game
-                game = self.ongoing_games[game_id]
-                # Creates a Board with the current FEN
-                board = chess.Board(game["fen"])
-                # Set current board turn
-                board.turn = game["color"] == "white"
-                return board
+        if selector is not None:
+            selector = selector.lstrip("#")
+            # Board number
+            if selector.isdigit():
+                board_number = int(selector)
+                for game_id, game_state in games:
+                    if game_state.board_number == board_number:
+                        return game_id
+                return None
+            # Game ID prefix, which must match a single game
+            if len(selector) < BotChess.MIN_GAME_PREFIX:
+                return None
+            game_ids = [game_id for game_id, _ in games if game_id.startswith(selector)]
+            return game_ids[0] if len(game_ids) == 1 else None
+
+        for game_id, game_state in games:
+            if game_state.is_my_turn() and (
+                move is None or game_state.get_move_key(move) is not None
+            ):
+                return game_id
         return None
 
-    def get_is_uci(self, move):
-        """ Check if move string is UCI
-        
+    def get_game_state(self, game_id):
+        """ Gets live state of given game
+
         Arguments:
-            move {str} -- Move string
-        
+            game_id {str} -- Game ID in Lichess
+
         Returns:
-            bool -- True if it is UCI move, False otherwise
+            GameState or None -- Game state or None if the game is not
+                being handled
         """
-        return BotChess.UCI_PATTERN.match(move)
+
+        with self.lock_game_states:
+            return self.game_states.get(game_id)
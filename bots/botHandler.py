@@ -1,14 +1,16 @@
 import time
-import os
-from threading import Lock, Thread
-import copy as cp
-
-import json
+import asyncio
+from threading import Thread, Lock
 
 from config.config import config
-from bots.botIRC import BotIRC
+from bots.botIRCPool import BotIRCPool
+from bots.messageQueue import MessageQueue
+from bots.obsState import ObsState
+from bots.overlayServer import OverlayServer
 from bots.botChess import BotChess
-from lib.misc import print_debug
+from bots.voterRegistry import VoterRegistry
+from lib.misc import print_debug, set_log_level
+from lib.scheduler import Scheduler
 
 
 class BotHandler:
@@ -21,6 +23,21 @@ class BotHandler:
     # one before. This is needed because OBS does not refresh
     # page after some time
     REFRESH_URL_INTERVAL = 1800  # 30 minutes
+    # Interval (seconds) to update URL in OBS json to the current game
+    URL_UPDATE_INTERVAL = 0.5
+
+    # Interval (seconds) to reconcile wins, draws and losses with the
+    # account ones, and to retry in case of error. In between, they are
+    # counted from game results
+    WDL_RECONCILE_INTERVAL = 3600
+    WDL_RETRY_INTERVAL = 30
+    # Field in OBS json of each game result
+    RESULT_FIELDS = {"win": "wins", "draw": "draws", "loss": "losses"}
+
+    # Default maximum number of chat messages treated at once by the worker
+    MAX_MESSAGES_BATCH = 256
+    # Interval (seconds) to log message queue counters, if messages were dropped
+    QUEUE_STATS_INTERVAL = 60
 
     # COMMANDS MUST START WITH '!'
     MSG_COMMANDS = ["!resign", "!challenge"]
@@ -31,190 +48,286 @@ class BotHandler:
         # Bots configurations
         self.config = config
 
-        # Create BotChess object
-        self.bot_chess = BotChess(config["lichess"], self)
-        # Create BotIRC object
-        self.bot_irc = BotIRC(config["twitch"])
+        # Minimum type of messages to log
+        set_log_level(config.get("log", {}).get("level", "DEBUG"))
+
+        # Runs periodic jobs of BotHandler and BotChess in a single thread
+        self.scheduler = Scheduler().start()
 
-        # Current game ids
-        self.game_ids = []
-        self.lock_game_ids = Lock()
+        # Users that already voted in certain games (created before BotChess,
+        # which uses it as soon as it starts)
+        self.voter_registry = VoterRegistry()
+
+        # Create BotChess object
+        self.bot_chess = BotChess(
+            config["lichess"],
+            self,
+            config["lichess"].get("mode", "anarchy"),
+            self.scheduler,
+        )
+        # Chat messages recieved and not treated yet. The IRC reader only
+        # puts messages in it, they are treated by the messages worker thread
+        queue_config = config["twitch"].get("queue", {})
+        self.message_queue = MessageQueue(
+            queue_config.get("max_size", 10000),
+            queue_config.get("policy", "drop_oldest"),
+        )
+        # Maximum number of chat messages treated at once (votes of a batch
+        # are counted together, see BotChess.vote_batch)
+        self.max_messages_batch = queue_config.get(
+            "batch_size", BotHandler.MAX_MESSAGES_BATCH
+        )
+        # Information shown by OBS, written to OBS json when it changes
+        self.obs_state = ObsState(BotHandler.PATH_OBS_JSON, self.create_obs_info_json)
+        # Game and color streamed in OBS and time the page was last refreshed
+        self.obs_last_game_id = self.get_game_id_from_url(self.obs_state.get()["url"])
+        self.obs_color = "white"
+        self.obs_refresh_time = time.time()
+        self.is_refreshing_obs_url = False
+        # True while a retry of the wins, draws and losses reconciliation is
+        # scheduled, so failed runs do not schedule more than one
+        self.is_retrying_obs_WDL = False
+        self.lock_obs_WDL_retry = Lock()
+        # Local server pushing OBS information to overlays as it changes
+        overlay_config = config.get("overlay", {})
+        self.overlay_server = None
+        if overlay_config.get("enabled", True):
+            self.overlay_server = OverlayServer(
+                self.obs_state,
+                overlay_config.get("host", "127.0.0.1"),
+                overlay_config.get("port", 8765),
+            )
 
-        # Users that already voted in certain games
-        self.users_already_voted = {}
-        self.lock_users_already_voted = Lock()
+        # Create BotIRCPool object (connects when BotHandler runs)
+        self.bot_irc = BotIRCPool(config["twitch"], self.message_queue.put_async)
 
     def run(self):
         """ Run BotHandler (start program) """
-        # Start game_id checking thread
-        self.thread_games = Thread(target=self.thread_update_game_ids, daemon=True)
-        self.thread_games.start()
-        # Start OBS thread to update wins, draws and losses
-        self.thread_obs_wdl = Thread(target=self.thread_obs_update_WDL, daemon=True)
-        self.thread_obs_wdl.start()
-        # Start OBS thread to update URL
-        self.thread_obs_url = Thread(target=self.thread_obs_update_URL, daemon=True)
-        self.thread_obs_url.start()
-        # Start Twitch thread
-        self.thread_twitch = Thread(target=self.thread_twitch_chat, daemon=True)
-        self.thread_twitch.start()
-
-        # Keeps running, because all threads are daemon
-        while True:
-            time.sleep(10)
+        # Schedule OBS jobs to reconcile wins, draws and losses and to update
+        # URL
+        self.scheduler.every(
+            BotHandler.WDL_RECONCILE_INTERVAL, self.reconcile_obs_WDL, blocking=True
+        )
+        self.scheduler.every(
+            BotHandler.URL_UPDATE_INTERVAL,
+            self.update_obs_URL,
+            delay=BotHandler.URL_UPDATE_INTERVAL,
+        )
+        # Start thread to write OBS json
+        self.thread_obs_json = Thread(target=self.obs_state.thread_writer, daemon=True)
+        self.thread_obs_json.start()
+        # Start thread to push OBS information to overlays
+        if self.overlay_server is not None:
+            self.thread_overlay = Thread(
+                target=self.overlay_server.thread_serve, daemon=True
+            )
+            self.thread_overlay.start()
+        # Start thread to treat chat messages
+        self.thread_messages = Thread(target=self.thread_treat_messages, daemon=True)
+        self.thread_messages.start()
 
-    def thread_update_game_ids(self):
-        """ Thread to update current games IDs """
+        # Listens to Twitch chat in the main thread, queueing each message
+        # as soon as it arrives. Keeps running, because all threads are daemon
+        asyncio.run(self.bot_irc.run())
 
-        while True:
-            time.sleep(0.2)
-            with self.lock_game_ids:
-                self.game_ids = self.bot_chess.get_ongoing_game_ids()
+    def treat_messages(self, messages):
+        """ Treats batch of messages from Twitch chat. Commands are treated
+            one by one and move votes all at once
+
+        Arguments:
+            messages {list(IRCMessage)} -- Parsed chat messages
+        """
 
-    def thread_twitch_chat(self):
-        """ Thread to listen messages in Twitch chat and treat them """
+        # Move votes in batch, as (user, game selector, move)
+        move_votes = []
 
-        while True:
-            time.sleep(0.2)
+        for message in messages:
+            print_debug("Message: {}", "DEBUG", message)
 
-            # Check for new messages
-            new_messages = self.bot_irc.recv_messages(1024)
+            # Tries to get command from message
+            command = self.get_command_from_msg(message.message)
 
-            # If there's no messages, continues
-            if new_messages is None:
+            if command is not None:
+                self.treat_command(command, message)
                 continue
 
-            for message in new_messages:
-                print_debug(f"Message: {message}", "DEBUG")
+            # Tries to get move (and game selector) from the message
+            vote = self.get_vote_from_msg(message.message)
+            if vote is not None:
+                move_votes.append((message.username, *vote))
 
-                # Tries to get command from message
-                command = self.get_command_from_msg(message["message"])
+        if len(move_votes) > 0:
+            self.treat_move_votes(move_votes)
 
-                if command is not None:
-                    self.treat_command(command, message)
-                    continue
+    def thread_treat_messages(self):
+        """ Thread to treat chat messages queued by the IRC reader """
 
-                # Tries to get move from the message
-                move = self.bot_chess.get_move_from_msg(message["message"])
-                if move is not None:
-                    self.treat_move_msg(move, message)
+        stats_time = time.monotonic()
+        last_dropped = 0
 
-    def thread_obs_update_WDL(self):
-        """ Thread to update wins, draws and losses in OBS json """
+        while True:
+            messages = self.message_queue.get_many(
+                self.max_messages_batch, timeout=BotHandler.QUEUE_STATS_INTERVAL
+            )
+            try:
+                self.treat_messages(messages)
+            except Exception as e:
+                print_debug(f"Unable to treat messages. Exception: {e}", "ERROR")
 
-        last_json = self.get_obs_info_json()
+            # Logs queue counters when messages were dropped since last time
+            if time.monotonic() - stats_time >= BotHandler.QUEUE_STATS_INTERVAL:
+                stats = self.message_queue.get_stats()
+                if stats["dropped"] > last_dropped:
+                    print_debug(
+                        "Message queue full, dropped {} messages"
+                        " (depth {}, max depth {}, {} messages recieved)",
+                        "WARNING",
+                        stats["dropped"] - last_dropped,
+                        stats["depth"],
+                        stats["max_depth"],
+                        stats["put"],
+                    )
+                last_dropped = stats["dropped"]
+                stats_time = time.monotonic()
 
-        while True:
-            time.sleep(5)
-            # Updates wins, draws and losses at the beginning
-            acc_info = self.bot_chess.get_account_info()
-            if acc_info is not None:
-                # Gets wins, draws and losses
-                wins, draws, losses = (
-                    acc_info["count"]["win"],
-                    acc_info["count"]["draw"],
-                    acc_info["count"]["loss"],
-                )
-                if (
-                    wins != last_json["wins"]
-                    or draws != last_json["draws"]
-                    or losses != last_json["losses"]
-                ):
-                    # Updates local json
-                    self.update_obs_json_WDL(wins, draws, losses)
-                    last_json = self.get_obs_info_json()
-
-    def thread_obs_update_URL(self):
-        """ Thread to update OBS json file """
-
-        last_game_id = self.get_game_id_from_url(self.get_obs_info_json()["url"])
-        refresh_time = time.time()
-        color = "white"
+    def reconcile_obs_WDL(self):
+        """ Reconciles wins, draws and losses in OBS json with the account
+            ones. They are counted from game results in between
+            (see treat_game_result)
+        """
 
-        while True:
-            time.sleep(0.5)
-
-            # If refresh time has passed, updated URL, wait some time and then
-            # go back to the page
-            if time.time() - refresh_time >= BotHandler.REFRESH_URL_INTERVAL:
-                # Updates URL to user page
-                self.update_obs_json_url(last_game_id)
-                time.sleep(3)
-                # Updated URL back to game_id
-                self.update_obs_json_url(last_game_id + "/" + color)
-                refresh_time = time.time()
-
-            # Get current ongoing games
-            games_ids = self.get_game_ids()
-
-            # Update URL that OBS is reading from
-            if len(games_ids) > 0:
-                # Gets current game ID
-                game_id = games_ids[0]
-                # If the game_id has changed, updates OBS json
-                if game_id != last_game_id:
-                    # Tries to get color in ongoing game
-                    color_aux = self.bot_chess.get_color_in_ongoing_game(game_id)
-                    if color_aux is not None:
-                        color = color_aux
-                    # Updated URL
-                    self.update_obs_json_url(game_id + "/" + color)
-                    # Updates last game ID
-                    last_game_id = game_id
-
-    def treat_move_msg(self, move, msg_dict):
-        """ Treats message with a move
+        acc_info = self.bot_chess.get_account_info()
+        if acc_info is None:
+            # Tries again soon in case of error, unless a retry is pending
+            with self.lock_obs_WDL_retry:
+                if self.is_retrying_obs_WDL:
+                    return
+                self.is_retrying_obs_WDL = True
+            self.scheduler.call_after(
+                BotHandler.WDL_RETRY_INTERVAL, self.retry_obs_WDL, blocking=True
+            )
+            return
+
+        # Gets wins, draws and losses
+        wins, draws, losses = (
+            acc_info["count"]["win"],
+            acc_info["count"]["draw"],
+            acc_info["count"]["loss"],
+        )
+        # Updates OBS json, if they have changed
+        self.update_obs_json_WDL(wins, draws, losses)
+
+    def retry_obs_WDL(self):
+        """ Retries reconciling wins, draws and losses after an error """
+
+        with self.lock_obs_WDL_retry:
+            self.is_retrying_obs_WDL = False
+        self.reconcile_obs_WDL()
+
+    def treat_game_result(self, game_id, result):
+        """ Counts result of finished game in OBS wins, draws and losses
 
         Arguments:
-            move {str} -- Move string
-            msg_dict {dict} -- Dictionary with message info
+            game_id {str} -- Game ID in Lichess
+            result {str} -- 'win', 'draw' or 'loss'
         """
 
-        # Get copy of current game ids
-        cp_game_ids = self.get_game_ids()
-        if len(cp_game_ids) == 0:
+        print_debug(f"Game {game_id} finished ({result})", "DEBUG")
+        self.obs_state.increment(BotHandler.RESULT_FIELDS[result])
+
+    def update_obs_URL(self):
+        """ Updates URL in OBS json to the current game """
+
+        # While refreshing, the URL is restored by restore_obs_URL
+        if self.is_refreshing_obs_url:
+            return
+
+        # If refresh time has passed, updates URL and goes back to the game
+        # page after some time
+        if time.time() - self.obs_refresh_time >= BotHandler.REFRESH_URL_INTERVAL:
+            # Updates URL to user page
+            self.update_obs_json_url(self.obs_last_game_id)
+            self.is_refreshing_obs_url = True
+            self.scheduler.call_after(3, self.restore_obs_URL)
             return
 
-        # Select game_id
-        # TODO: more robust way to define game_id
-        # (needed if there's more than one game)
-        game_id = cp_game_ids[0]
+        # Get current ongoing games. ID and color are read from the same
+        # snapshot, so the color is the one of the game
+        ongoing_games = self.bot_chess.get_ongoing_games()
+
+        # Update URL that OBS is reading from
+        if len(ongoing_games) > 0:
+            # Gets current game ID
+            game_id = next(iter(ongoing_games))
+            # If the game_id has changed, updates OBS json
+            if game_id != self.obs_last_game_id:
+                self.obs_color = ongoing_games[game_id]["color"]
+                # Updated URL
+                self.update_obs_json_url(game_id + "/" + self.obs_color)
+                # Updates last game ID
+                self.obs_last_game_id = game_id
+
+    def restore_obs_URL(self):
+        """ Updates URL in OBS json back to the game after refreshing """
+
+        self.update_obs_json_url(self.obs_last_game_id + "/" + self.obs_color)
+        self.obs_refresh_time = time.time()
+        self.is_refreshing_obs_url = False
+
+    def treat_move_votes(self, move_votes):
+        """ Treats move votes from chat, routing each one to its game
+            (see BotChess.get_vote_game_id)
 
-        # If the user has already voted in that game, it does not
-        # let him vote again
-        if self.get_has_user_already_voted(game_id, msg_dict["username"]):
-            print_debug(f"{msg_dict['username']} trying to vote again", "DEBUG")
+        Arguments:
+            move_votes {list(tuple)} -- Votes as (user, game selector or
+                None, move string)
+        """
+
+        # Gets games once for all votes
+        games = self.bot_chess.get_board_games()
+        if len(games) == 0:
             return
-        # Votes for move in the game
-        ret = self.bot_chess.vote_for_move(game_id, move)
-        if ret:
-            # Set user as already voted in the game
-            self.set_user_as_already_voted(game_id, msg_dict["username"])
 
-    def treat_command(self, command, msg_dict):
+        # Votes of each game, as {game_id: [(user, move)]}
+        game_votes = {}
+        for user, selector, move in move_votes:
+            game_id = self.bot_chess.get_vote_game_id(games, move, selector)
+            if game_id is not None:
+                game_votes.setdefault(game_id, []).append((user, move))
+
+        # Votes for moves in each game. Users that already voted in a game
+        # are not allowed to vote again
+        for game_id, votes in game_votes.items():
+            self.bot_chess.vote_batch(game_id, votes)
+
+    def treat_command(self, command, message):
         """ Treats command from message
 
         Arguments:
             command {dict} -- Dictionary as {"!command_name": command_msg}
-            msg_dict {dict} -- Dictionary with message info
+            message {IRCMessage} -- Parsed chat message
         """
 
-        # Treats !resign command
+        # Treats !resign command, as '!resign', '!resign 2' (board number) or
+        # '!resign <game ID prefix>'
         if "!resign" in command.keys():
-            # Gets copy of game ids
-            cp_game_ids = self.get_game_ids()
+            games = self.bot_chess.get_board_games()
             # If there's no game, don't do nothing
-            if len(cp_game_ids) == 0:
+            if len(games) == 0:
                 print_debug("There is no game, unable to resign", "DEBUG")
                 return
 
-            # Select game_id
-            # TODO: more robust way to define game_id
-            # (needed if there's more than one game)
-            game_id = cp_game_ids[0]
+            # Selects given game or the first one in our turn (or the first
+            # one, if it is not our turn in any)
+            selector = command["!resign"]
+            game_id = self.bot_chess.get_vote_game_id(games, selector=selector)
+            if game_id is None and selector is None:
+                game_id = games[0][0]
+            if game_id is None:
+                return
             ret = self.bot_chess.vote_for_resign(game_id)
             if ret:
-                self.set_user_as_already_voted(game_id, msg_dict["username"])
+                self.set_user_as_already_voted(game_id, message.username)
 
         # TODO: Treatment of !challenge command
         if "!challenge" in command.keys():
@@ -227,10 +340,7 @@ class BotHandler:
             game_id {str} -- Game ID in Lichess
         """
 
-        with self.lock_users_already_voted:
-            if game_id not in self.users_already_voted.keys():
-                return
-            self.users_already_voted[game_id] = []
+        self.voter_registry.reset(game_id)
 
     def set_user_as_already_voted(self, game_id, user):
         """ Set given user as already voted in given game 
@@ -240,15 +350,21 @@ class BotHandler:
             user {str} -- User in Twitch
         """
 
-        with self.lock_users_already_voted:
-            # Adds list of users that already voted in game_id
-            # if it has not been created yet
-            if game_id not in self.users_already_voted.keys():
-                self.users_already_voted[game_id] = []
-            # Appends user to the list of users that already voted in
-            # game_id, if he is not already in it
-            if user not in self.users_already_voted[game_id]:
-                self.users_already_voted[game_id].append(user)
+        self.voter_registry.add(game_id, user)
+
+    def set_users_as_already_voted(self, game_id, users):
+        """ Set given users as already voted in given game
+
+        Arguments:
+            game_id {str} -- Game ID in Lichess
+            users {list(str)} -- Users in Twitch
+
+        Returns:
+            list(bool) -- For each user, True if they had not voted yet,
+                False otherwise
+        """
+
+        return self.voter_registry.add_many(game_id, users)
 
     def get_has_user_already_voted(self, game_id, user):
         """ Get if given user has already voted in given game
@@ -261,42 +377,27 @@ class BotHandler:
             bool -- True if user has already voted, False otherwise
         """
 
-        with self.lock_users_already_voted:
-            # If there's no list of users yet
-            if game_id not in self.users_already_voted.keys():
-                return False
-            # If the user is not in the list of user that
-            # already voted in game_id
-            if user not in self.users_already_voted[game_id]:
-                return False
-        return True
+        return self.voter_registry.has_voted(game_id, user)
 
-    def update_obs_json_url(self, lichess_route):
-        """ Upate URL in OBS json to stream given Lichess route
+    def evict_finished_games(self, ongoing_game_ids):
+        """ Forgets users that voted in games that are not ongoing anymore
 
         Arguments:
-            lichess_route {str} -- Route in lichess.org
+            ongoing_game_ids {set(str)} -- IDs of ongoing games
         """
 
-        try:
-            # Gets OBS json as dictionary
-            json_info = self.get_obs_info_json()
-
-            # Updates URL
-            url = f"http://www.lichess.org/{lichess_route}"
-            json_info["url"] = url
+        self.voter_registry.evict(ongoing_game_ids)
 
-            # Updates OBS json
-            with open(BotHandler.PATH_OBS_JSON, "w") as f:
-                json.dump(json_info, f)
+    def update_obs_json_url(self, lichess_route):
+        """ Upate URL in OBS json to stream given Lichess route
 
-            print_debug(f"Wrote {url} to {BotHandler.PATH_OBS_JSON}", "DEBUG")
+        Arguments:
+            lichess_route {str} -- Route in lichess.org
+        """
 
-        except Exception as e:
-            print_debug(
-                f"Unable to update url in {BotHandler.PATH_OBS_JSON}."
-                + f" Exception: {e}"
-            )
+        url = f"http://www.lichess.org/{lichess_route}"
+        if self.obs_state.update(url=url):
+            print_debug(f"Set {url} as OBS URL", "DEBUG")
 
     def update_obs_json_WDL(self, wins, draws, losses):
         """ Upate wins, draws and losses in OBS json
@@ -307,71 +408,38 @@ class BotHandler:
             losses {int} -- Number of losses
         """
 
-        try:
-            # Gets OBS json as dictionary
-            json_info = self.get_obs_info_json()
+        if self.obs_state.update(wins=wins, draws=draws, losses=losses):
+            print_debug(f"Set {wins}-{draws}-{losses} as OBS W-D-L", "DEBUG")
 
-            # Updates wins, draws and losses
-            json_info["wins"] = wins
-            json_info["draws"] = draws
-            json_info["losses"] = losses
-
-            # Updates OBS json
-            with open(BotHandler.PATH_OBS_JSON, "w") as f:
-                json.dump(json_info, f)
+    def create_obs_info_json(self):
+        """ Creates OBS information, with URL from last game played
 
-            print_debug(f"Updated W-D-L of {BotHandler.PATH_OBS_JSON}", "DEBUG")
+        Returns:
+            dict -- OBS information
+        """
 
+        # Get last played game ID
+        try:
+            last_id = self.bot_chess.get_id_last_game_played()
         except Exception as e:
-            print_debug(
-                f"Unable to update WDL in {BotHandler.PATH_OBS_JSON}."
-                + f" Exception: {e}"
-            )
-
-    def create_obs_info_json(self):
-        """ Creates OBS json file """
+            print_debug(f"Unable to get last game played. Exception: {e}")
+            last_id = None
 
-        with open(BotHandler.PATH_OBS_JSON, "w") as f:
-            # Get last played game ID
-            last_id = self.bot_chess.get_id_last_game_played()
-            # Creates OBS json file with URL from last game played
-            json.dump(
-                {
-                    "wins": 0,
-                    "losses": 0,
-                    "draws": 0,
-                    "url": "http://www.lichess.org/"
-                    + (last_id if last_id is not None else ""),
-                },
-                f,
-            )
-        print_debug(f"Create {BotHandler.PATH_OBS_JSON} as OBS json", "DEBUG")
+        return {
+            "wins": 0,
+            "losses": 0,
+            "draws": 0,
+            "url": "http://www.lichess.org/" + (last_id if last_id is not None else ""),
+        }
 
     def get_obs_info_json(self):
-        """ Gets OBS json as dictionary
+        """ Gets OBS information (as written in OBS json)
 
         Returns:
-            dict or None -- OBS json information or None in case of error
+            dict -- Copy of OBS information
         """
 
-        if not os.path.exists(BotHandler.PATH_OBS_JSON):
-            print_debug(f"File {BotHandler.PATH_OBS_JSON} does not exists", "DEBUG")
-            self.create_obs_info_json()
-
-        with open(BotHandler.PATH_OBS_JSON, "r") as f:
-            try:
-                json_info = json.load(f)
-            except Exception as e:
-                print_debug(f"Unable to read OBS json. Excepction: {e}", "DEBUG")
-                self.create_obs_info_json()
-                try:
-                    json_info = json.load(f)
-                except Exception as e2:
-                    print_debug(
-                        f"I give up on reading OBS json. Exception {e2}", "ERROR"
-                    )
-                    return None
-            return json_info
+        return self.obs_state.get()
 
     def get_game_id_from_url(self, url):
         """ Get Lichess game ID from given URL
@@ -388,13 +456,36 @@ class BotHandler:
         """ Get current Lichess games IDs
         
         Returns:
-            list -- List of games IDs
+            tuple -- Snapshot of games IDs
         """
 
-        cp_game_ids = None
-        with self.lock_game_ids:
-            cp_game_ids = cp.deepcopy(self.game_ids)
-        return cp_game_ids
+        return self.bot_chess.get_ongoing_game_ids()
+
+    def get_vote_from_msg(self, msg):
+        """ Gets move vote from given message, as 'e4' or with the game
+            before the move, as '2 e4', '#2 e4' (board number) or
+            'abcd e4' (game ID prefix)
+
+        Arguments:
+            msg {str} -- Message to get vote from
+
+        Returns:
+            tuple or None -- Vote as (game selector or None, move string) in
+                case a move is found, None otherwise
+        """
+
+        words = msg.split()
+        if len(words) == 1:
+            selector, move = None, words[0]
+        elif len(words) == 2:
+            selector, move = words
+        else:
+            return None
+
+        move = self.bot_chess.get_move_from_msg(move)
+        if move is None:
+            return None
+        return selector, move
 
     def get_command_from_msg(self, msg):
         """ Gets command from given message
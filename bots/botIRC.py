@@ -1,23 +1,122 @@
 import socket
 import sys
 import re
+import codecs
+from collections import namedtuple
 
 from lib.misc import print_debug
 
 
+class IRCMessage(namedtuple("IRCMessage", ["raw_tags", "prefix", "command", "params"])):
+    """ Parsed IRC line
+
+    Fields:
+        raw_tags {str or None} -- IRCv3 tags (without '@'), None if line
+            has no tags
+        prefix {str or None} -- Prefix (without ':'), as "nick!user@host"
+        command {str} -- IRC command, as "PRIVMSG"
+        params {tuple(str)} -- Command parameters, trailing one included
+    """
+
+    __slots__ = ()
+
+    # IRCv3 tag values escapes ("\:" is ";", "\s" is " ", etc.)
+    TAG_ESCAPE_PATTERN = re.compile(r"\\(.?)")
+    TAG_ESCAPES = {":": ";", "s": " ", "\\": "\\", "r": "\r", "n": "\n"}
+
+    @property
+    def tags(self):
+        """ dict or None -- IRCv3 tags with unescaped values """
+        if self.raw_tags is None:
+            return None
+
+        tags = {}
+        for tag in self.raw_tags.split(";"):
+            key, _, value = tag.partition("=")
+            if "\\" in value:
+                value = IRCMessage.TAG_ESCAPE_PATTERN.sub(
+                    lambda m: IRCMessage.TAG_ESCAPES.get(m.group(1), m.group(1)),
+                    value,
+                )
+            tags[key] = value
+        return tags
+
+    @property
+    def username(self):
+        """ str or None -- Nick of the message sender """
+        if self.prefix is None:
+            return None
+        return self.prefix.partition("!")[0]
+
+    @property
+    def channel(self):
+        """ str or None -- Channel (first parameter), as "#channel" """
+        return self.params[0] if len(self.params) > 0 else None
+
+    @property
+    def message(self):
+        """ str or None -- Message text (trailing parameter) """
+        return self.params[-1] if len(self.params) > 1 else None
+
+
+class IRCLineBuffer:
+    """ Splits data recieved from IRC server into complete lines. Incomplete
+        lines and multibyte characters split across reads are kept until
+        the rest is recieved. Shared by BotIRC and BotIRCAsync
+    """
+
+    def __init__(self):
+        """ IRCLineBuffer constructor """
+
+        self.reset()
+
+    def reset(self):
+        """ Forgets data recieved, for a new connection """
+
+        # Decoder keeps multibyte characters split across reads
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        # Data recieved after the last complete line
+        self.buffer = ""
+
+    def feed(self, data):
+        """ Adds data recieved and gets the lines completed by it
+
+        Arguments:
+            data {bytes} -- Data recieved
+
+        Returns:
+            list(str) -- Complete lines (without line ending)
+        """
+
+        # Last element is the incomplete line (or "" if data ended in "\r\n")
+        self.buffer += self.decoder.decode(data)
+        *lines, self.buffer = self.buffer.split("\r\n")
+        return lines
+
+
 class BotIRC:
 
     socket_retry_count = 0
 
+    LOGIN_UNSUCCESSFUL_PATTERN = re.compile(
+        r"^:(testserver\.local|tmi\.twitch\.tv) NOTICE \* :Login unsuccessful$"
+    )
+
+    # Size of each read from socket. Large reads make a chat flood cost few
+    # syscalls, since every read may carry many lines
+    RECV_BUFFER_SIZE = 65536
+
     def __init__(self, config):
         self.config = config
         self.sock = None
+        self.recv_buffer = IRCLineBuffer()
         self.set_socket_object()
 
     def set_socket_object(self):
         """ Sets socket object """
 
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.recv_buffer.reset()
 
         self.sock.settimeout(10)
 
@@ -49,7 +148,7 @@ class BotIRC:
         self.sock.send(bytes("PASS {}\r\n".format(password), encoding="utf-8"))
         self.sock.send(bytes("NICK {}\r\n".format(username), encoding="utf-8"))
 
-        if not self.check_login_status(self.recv()):
+        if not BotIRC.check_login_lines(self.recv_lines()):
             print_debug("Invalid login.", "ERROR")
             sys.exit()
         else:
@@ -58,102 +157,136 @@ class BotIRC:
         self.sock.send(bytes("JOIN #{}\r\n".format(username), encoding="utf-8"))
         print_debug("Joined #{}".format(username))
 
-    def ping(self, data):
-        """ Pings socket
+    def pong(self, message):
+        """ Answers PING message with PONG
         
         Arguments:
-            data {bytes} -- Data to ping
+            message {IRCMessage} -- PING message
         """
 
-        if data.startswith("PING"):
-            self.sock.send(bytes(data.replace("PING", "PONG"), encoding="utf-8"))
+        self.sock.send(
+            bytes("PONG :{}\r\n".format(" ".join(message.params)), encoding="utf-8")
+        )
 
-    def recv(self, amount=1024):
-        """ Recieves data from socket with given ammount size
+    def recv_lines(self, amount=RECV_BUFFER_SIZE):
+        """ Recieves data from socket and gets the complete lines in it.
+            Incomplete lines are kept in buffer until the rest is recieved
         
         Keyword Arguments:
-            amount {int} -- Data ammount size (default: {1024})
+            amount {int} -- Data ammount size (default: {RECV_BUFFER_SIZE})
         
         Returns:
-            str -- Bytes recieved in 'utf-8'
+            list(str) or None -- List of complete lines (without line ending)
+                or None in case the connection was closed
         """
 
-        return self.sock.recv(amount).decode("utf-8")
+        data = self.sock.recv(amount)
+        if not data:
+            return None
+        return self.recv_buffer.feed(data)
 
-    def recv_messages(self, amount=1024):
+    def recv_messages(self, amount=RECV_BUFFER_SIZE):
         """ Recieves messages from socket and parses it
         
         Keyword Arguments:
-            amount {int} -- Data ammount size (default: {1024})
+            amount {int} -- Data ammount size (default: {RECV_BUFFER_SIZE})
         
         Returns:
-            list(dict) -- List of parsed messages
+            list(IRCMessage) or None -- List of parsed PRIVMSG messages or
+                None if there is none
         """
-        data = self.recv(amount)
+        lines = self.recv_lines(amount)
 
-        if not data:
+        if lines is None:
             print_debug("Lost connection, reconnecting.", "ERROR")
             return self.set_socket_object()
 
-        self.ping(data)
+        pings, messages = BotIRC.parse_lines(lines)
+        for ping in pings:
+            self.pong(ping)
 
-        if self.check_has_message(data) is not None:
-            return [
-                self.parse_message(line) for line in filter(None, data.split("\r\n"))
-            ]
-        return None
+        return messages if len(messages) > 0 else None
 
     def check_login_status(self, data):
         """ Check if login was successful or not
 
         Arguments:
-            data {str} -- Data recieved from socket
+            data {str} -- Line recieved from socket
 
         Returns:
             bool -- True in case of successful login, False otherwise
         """
 
-        if not re.match(
-            r"^:(testserver\.local|tmi\.twitch\.tv)"
-            + r" NOTICE \* :Login unsuccessful\r\n$",
-            data,
-        ):
-            return True
-        return False
+        return BotIRC.LOGIN_UNSUCCESSFUL_PATTERN.match(data) is None
 
-    def check_has_message(self, data):
-        """ Check if given data has message
+    @staticmethod
+    def check_login_lines(lines):
+        """ Check if login was successful from the lines recieved after it
 
         Arguments:
-            data {str} -- Data to checkc
+            lines {list(str) or None} -- Lines recieved from socket, None if
+                the connection was closed
 
         Returns:
-            Match object or None -- Match object if message was found, 
-                None otherwise
+            bool -- True in case of successful login, False otherwise
         """
-        return re.match(
-            r"^:[a-zA-Z0-9_]+\![a-zA-Z0-9_]+@[a-zA-Z0-9_]"
-            + r"+(\.tmi\.twitch\.tv|\.testserver\.local) "
-            + r"PRIVMSG #[a-zA-Z0-9_]+ :.+$",
-            data,
+
+        return lines is not None and all(
+            BotIRC.LOGIN_UNSUCCESSFUL_PATTERN.match(line) is None for line in lines
         )
 
-    def parse_message(self, data):
-        """ Parses message from given data
+    @staticmethod
+    def parse_lines(lines):
+        """ Parses lines recieved from IRC server, keeping the ones the bot
+            treats
+
+        Arguments:
+            lines {list(str)} -- Lines recieved (without line ending)
+
+        Returns:
+            tuple -- (PING messages to answer, PRIVMSG messages with text),
+                as lists of IRCMessage
+        """
+
+        pings = []
+        messages = []
+        for line in lines:
+            message = BotIRC.parse_line(line)
+            if message is None:
+                continue
+            if message.command == "PING":
+                pings.append(message)
+            elif message.command == "PRIVMSG" and message.message:
+                messages.append(message)
+        return pings, messages
+
+    @staticmethod
+    def parse_line(line):
+        """ Parses IRC line in a single pass, as
+            "[@tags] [:prefix] command [params] [:trailing]"
         
         Arguments:
-            data {str} -- Message to parse
+            line {str} -- Line recieved from socket (without line ending)
         
         Returns:
-            dict -- Dictionary as {'channel': channel,
-                'username': username,
-                'message': message}
+            IRCMessage or None -- Parsed message or None if line is empty
         """
 
-        return {
-            "channel": re.findall(
-                r"^:.+\![a-zA-Z0-9_]+@[a-zA-Z0-9_]" + r"+.+ PRIVMSG (.*?) :", data
-            )[0],
-            "username": re.findall(r"^:([a-zA-Z0-9_]+)\!", data)[0],
-            "message": re.findall(r"PRIVMSG #[a-zA-Z0-9_]+ :(.+)", data)[0],
-        }
+        # Tags are only split when accessed (IRCMessage.tags)
+        raw_tags = None
+        if line.startswith("@"):
+            raw_tags, _, line = line[1:].partition(" ")
+
+        prefix = None
+        if line.startswith(":"):
+            prefix, _, line = line[1:].partition(" ")
+
+        # Trailing parameter is the only one that may contain spaces
+        line, has_trailing, trailing = line.partition(" :")
+        params = line.split()
+        if len(params) == 0:
+            return None
+        if has_trailing:
+            params.append(trailing)
+
+        return IRCMessage(raw_tags, prefix, params[0], tuple(params[1:]))
@@ -0,0 +1,203 @@
+import asyncio
+import sys
+
+from bots.botIRC import BotIRC, IRCLineBuffer
+from lib.misc import print_debug
+
+
+class BotIRCAsync:
+    """ Twitch chat client built on asyncio streams. Messages are dispatched
+        as soon as they are recieved, while PING/PONG and reconnection run as
+        tasks in the same event loop. BotIRC is the blocking (thread-based)
+        equivalent.
+    """
+
+    # Number of consecutive failed connections before giving up
+    MAX_CONNECT_RETRIES = 3
+    # Timeout (seconds) to connect to IRC server
+    CONNECT_TIMEOUT = 10
+    # Interval (seconds) without recieving data before pinging the server
+    PING_INTERVAL = 240
+    # Time (seconds) to wait for an answer to our PING before reconnecting
+    PING_TIMEOUT = 10
+    # Time (seconds) to wait before reconnecting after losing connection
+    RECONNECT_DELAY = 1
+    # Maximum JOINs per JOIN_RATE_INTERVAL seconds in each connection
+    JOIN_RATE_LIMIT = 20
+    JOIN_RATE_INTERVAL = 10
+
+    def __init__(self, config, on_message, channels=None):
+        """ BotIRCAsync constructor
+
+        Arguments:
+            config {dict} -- Twitch configuration ('irc', 'account')
+            on_message {coroutine function} -- Awaited with each PRIVMSG
+                recieved (IRCMessage), from the event loop. It must not block
+                the loop (as MessageQueue.put_async). While it waits, this
+                connection stops reading, so the server is pushed back
+
+        Keyword Arguments:
+            channels {list(str)} -- Channels to join, without '#'
+                (default: {None}, the account's own channel)
+        """
+
+        self.config = config
+        self.on_message = on_message
+
+        if channels is None:
+            channels = [config["account"]["username"]]
+        self.channels = [channel.lower().lstrip("#") for channel in channels]
+
+        self.reader = None
+        self.writer = None
+        self.recv_buffer = IRCLineBuffer()
+        # Event loop time of last data recieved
+        self.last_recv_time = 0
+
+    async def run(self):
+        """ Connects to IRC server and dispatches messages forever,
+            reconnecting whenever the connection is lost
+        """
+
+        while True:
+            await self.connect()
+
+            tasks = [
+                asyncio.create_task(self.join_channels()),
+                asyncio.create_task(self.keepalive()),
+            ]
+            try:
+                await self.read_messages()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                self.writer.close()
+
+            print_debug("Lost connection, reconnecting.", "ERROR")
+            await asyncio.sleep(BotIRCAsync.RECONNECT_DELAY)
+
+    async def connect(self):
+        """ Connects and logs in """
+
+        username = self.config["account"]["username"].lower()
+        password = self.config["account"]["password"]
+
+        server = self.config["irc"]["server"]
+        port = self.config["irc"]["port"]
+
+        retry_count = 0
+        while True:
+            try:
+                self.reader, self.writer = await asyncio.wait_for(
+                    asyncio.open_connection(server, port),
+                    timeout=BotIRCAsync.CONNECT_TIMEOUT,
+                )
+                break
+            except (OSError, asyncio.TimeoutError):
+                retry_count += 1
+                print_debug(
+                    "Error connecting to IRC server. ({}:{}) ({})".format(
+                        server, port, retry_count
+                    ),
+                    "error",
+                )
+                if retry_count >= BotIRCAsync.MAX_CONNECT_RETRIES:
+                    sys.exit()
+                await asyncio.sleep(retry_count)
+
+        self.recv_buffer.reset()
+        self.last_recv_time = asyncio.get_running_loop().time()
+
+        await self.send("USER {}".format(username))
+        await self.send("PASS {}".format(password))
+        await self.send("NICK {}".format(username))
+
+        if not BotIRC.check_login_lines(await self.recv_lines()):
+            print_debug("Invalid login.", "ERROR")
+            sys.exit()
+        else:
+            print_debug("Login successful!")
+
+    async def join_channels(self):
+        """ Joins channels, respecting the JOIN rate limit """
+
+        for i in range(0, len(self.channels), BotIRCAsync.JOIN_RATE_LIMIT):
+            if i > 0:
+                await asyncio.sleep(BotIRCAsync.JOIN_RATE_INTERVAL)
+
+            for channel in self.channels[i : i + BotIRCAsync.JOIN_RATE_LIMIT]:
+                await self.send("JOIN #{}".format(channel))
+                print_debug("Joined #{}".format(channel))
+
+    async def send(self, line):
+        """ Sends line to IRC server. In case of error, closes the connection
+            so it is reestablished
+
+        Arguments:
+            line {str} -- Line to send (without line ending)
+        """
+
+        try:
+            self.writer.write(bytes(line + "\r\n", encoding="utf-8"))
+            await self.writer.drain()
+        except OSError as e:
+            print_debug(f"Unable to send to IRC server. Exception: {e}", "ERROR")
+            self.writer.close()
+
+    async def recv_lines(self):
+        """ Recieves data from IRC server and gets the complete lines in it.
+            Incomplete lines are kept in buffer until the rest is recieved
+
+        Returns:
+            list(str) or None -- List of complete lines (without line ending)
+                or None in case the connection was closed
+        """
+
+        try:
+            data = await self.reader.read(BotIRC.RECV_BUFFER_SIZE)
+        except OSError:
+            return None
+        if not data:
+            return None
+
+        self.last_recv_time = asyncio.get_running_loop().time()
+        return self.recv_buffer.feed(data)
+
+    async def read_messages(self):
+        """ Reads lines until the connection is closed, answering PINGs and
+            dispatching PRIVMSGs
+        """
+
+        while True:
+            lines = await self.recv_lines()
+            if lines is None:
+                return
+
+            pings, messages = BotIRC.parse_lines(lines)
+            for ping in pings:
+                await self.send("PONG :{}".format(" ".join(ping.params)))
+            for message in messages:
+                await self.on_message(message)
+
+    async def keepalive(self):
+        """ Pings the server when the connection is idle and closes the
+            connection if the server does not answer, so it is reestablished
+        """
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            # Sleeps until the connection has been idle for PING_INTERVAL
+            idle_time = loop.time() - self.last_recv_time
+            if idle_time < BotIRCAsync.PING_INTERVAL:
+                await asyncio.sleep(BotIRCAsync.PING_INTERVAL - idle_time)
+                continue
+
+            ping_time = loop.time()
+            await self.send("PING :tmi.twitch.tv")
+            await asyncio.sleep(BotIRCAsync.PING_TIMEOUT)
+
+            if self.last_recv_time < ping_time:
+                print_debug("IRC server did not answer PING.", "ERROR")
+                self.writer.close()
+                return
@@ -0,0 +1,42 @@
+import asyncio
+
+from bots.botIRCAsync import BotIRCAsync
+
+
+class BotIRCPool:
+    """ Pool of Twitch chat connections. Channels are spread across the
+        connections and the messages of all of them are dispatched to the
+        same callback, tagged with their channel (IRCMessage.channel).
+        Each connection reads in its own task, so a slow one does not stall
+        the others.
+    """
+
+    def __init__(self, config, on_message):
+        """ BotIRCPool constructor
+
+        Arguments:
+            config {dict} -- Twitch configuration ('irc', 'account' and
+                optionally 'channels')
+            on_message {coroutine function} -- Awaited with each PRIVMSG
+                recieved (IRCMessage), from the event loop. While it waits,
+                only the connection that recieved the message stops reading
+        """
+
+        self.config = config
+
+        # Channels to read messages from, defaults to the account's own
+        channels = config.get("channels") or [config["account"]["username"]]
+        # Number of connections to spread the channels across
+        num_connections = max(
+            1, min(config["irc"].get("connections", 1), len(channels))
+        )
+
+        self.connections = [
+            BotIRCAsync(config, on_message, channels[i::num_connections])
+            for i in range(num_connections)
+        ]
+
+    async def run(self):
+        """ Runs all connections until the program ends """
+
+        await asyncio.gather(*[connection.run() for connection in self.connections])
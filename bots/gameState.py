@@ -0,0 +1,259 @@
+from threading import Lock
+
+import chess
+
+from bots.moveVotes import MoveVotes
+
+
+class GameState:
+    """ Live state of an ongoing game, updated move by move from the
+        Lichess game state stream
+    """
+
+    def __init__(self, game_id, color, on_change=None, board_number=1):
+        """ GameState constructor
+
+        Arguments:
+            game_id {str} -- Game ID in Lichess
+            color {str} -- Our color in the game ('white' or 'black')
+
+        Keyword Arguments:
+            on_change {function} -- Called with the game ID when the game
+                changes (see notify_change) (default: {None})
+            board_number {int} -- Board number the game is shown and voted
+                as, kept while the game is handled (default: {1})
+        """
+
+        self.game_id = game_id
+        self.color = color
+        self.board_number = board_number
+
+        # Current position
+        self.board = chess.Board()
+        # Moves played (UCI), as recieved from stream
+        self.moves = []
+        # Game status ('started', 'mate', 'resign', etc.)
+        self.status = None
+        # Color of the winner ('white' or 'black'), None if not decided
+        self.winner = None
+        # True after the first event of the stream (gameFull) is recieved
+        self.is_synced = False
+        # Accepted spellings of legal moves in our turn, as
+        # {spelling: move key} (see build_move_index)
+        self.move_index = {}
+
+        # Ply our move was made in, until the stream gets it. Votes are not
+        # accepted meanwhile, as they would be for the old position
+        self.move_pending_ply = None
+
+        # Ply of the turn the voting window was opened for and its deadline
+        # (monotonic time). Only used with BotChess.lock_game_move_votes held
+        # (see BotChess.open_voting_window)
+        self.window_ply = None
+        self.window_deadline = None
+
+        self.lock = Lock()
+
+        # Called when the game changes (moves, votes, end), so its moves are
+        # made (see notify_change)
+        self.on_change = on_change
+
+    def treat_event(self, event):
+        """ Treats event from game state stream
+
+        Arguments:
+            event {dict} -- Event as recieved from stream
+        """
+
+        if event["type"] == "gameFull":
+            state = event["state"]
+            with self.lock:
+                # Initial position (not startpos in games from position)
+                if event.get("initialFen", "startpos") == "startpos":
+                    self.board = chess.Board()
+                else:
+                    self.board = chess.Board(
+                        event["initialFen"],
+                        chess960=event["variant"]["key"] == "chess960",
+                    )
+                self.moves = []
+        elif event["type"] == "gameState":
+            state = event
+        else:  # chatLine, opponentGone
+            return
+
+        self.update_moves(state["moves"].split())
+        self.winner = state.get("winner")
+        self.status = state["status"]
+        self.is_synced = True
+        self.notify_change()
+
+    def update_moves(self, moves):
+        """ Updates board with given list of moves played since the start of
+            the game. Only new moves are pushed
+
+        Arguments:
+            moves {list(str)} -- Moves played (UCI)
+        """
+
+        with self.lock:
+            # If some move was taken back, goes back to the common position
+            num_common = len(self.moves)
+            if moves[:num_common] != self.moves:
+                num_common = 0
+                while (
+                    num_common < min(len(moves), len(self.moves))
+                    and moves[num_common] == self.moves[num_common]
+                ):
+                    num_common += 1
+                for _ in range(len(self.moves) - num_common):
+                    self.board.pop()
+                del self.moves[num_common:]
+
+            for move in moves[num_common:]:
+                self.board.push_uci(move)
+                self.moves.append(move)
+
+            # Our move was recieved (or taken back)
+            if len(self.moves) != self.move_pending_ply:
+                self.move_pending_ply = None
+
+            # Votes are only accepted in our turn, until our move is made
+            if (
+                self.board.turn == (self.color == "white")
+                and self.move_pending_ply is None
+            ):
+                self.move_index = self.build_move_index()
+            else:
+                self.move_index = {}
+
+    def build_move_index(self):
+        """ Builds index of accepted spellings of each legal move in the
+            current position: SAN, UCI, castling with '0' or 'o', promotion
+            without '=' and lowercase piece letters. Check marks and
+            annotations are stripped from votes (see get_move_key), so they
+            are not in the index
+
+        Returns:
+            dict -- Index as {spelling: move key} (see MoveVotes.encode_move)
+        """
+
+        move_index = {}
+        lowercase_spellings = []
+
+        for move in self.board.legal_moves:
+            key = MoveVotes.encode_move(move)
+            uci = move.uci()
+            san = self.board.san(move).rstrip("+#")
+
+            spellings = [san, uci]
+            if san.startswith("O-O"):
+                spellings += [san.replace("O", "0"), san.lower()]
+            if move.promotion is not None:
+                spellings.append(san.replace("=", ""))
+
+            for spelling in spellings:
+                move_index[spelling] = key
+            lowercase_spellings += [(spelling.lower(), key) for spelling in spellings]
+
+        # Lowercase spellings never replace exact ones (as 'bxc3', a pawn
+        # capture, and 'Bxc3', a bishop capture)
+        for spelling, key in lowercase_spellings:
+            move_index.setdefault(spelling, key)
+
+        return move_index
+
+    def get_move_key(self, move):
+        """ Gets legal move for given vote
+
+        Arguments:
+            move {str} -- Move vote, as 'e4', 'Nf3+', 'e7e5' or '0-0'
+
+        Returns:
+            int or None -- Move key (see MoveVotes.encode_move) or None if
+                the vote is not a legal move in our turn
+        """
+
+        return self.move_index.get(move.rstrip("+#!?"))
+
+    def set_move_pending(self, ply):
+        """ Marks that our move was made in given ply, so votes are not
+            accepted until the stream gets it
+
+        Arguments:
+            ply {int} -- Ply the move was made in (see get_ply)
+        """
+
+        with self.lock:
+            # Stream may have got the move already
+            if len(self.moves) == ply:
+                self.move_pending_ply = ply
+                self.move_index = {}
+
+    def notify_change(self):
+        """ Notifies that the game has changed """
+
+        if self.on_change is not None:
+            self.on_change(self.game_id)
+
+    def get_ply(self):
+        """ Gets number of moves played
+
+        Returns:
+            int -- Number of half-moves played since the start of the game
+        """
+
+        with self.lock:
+            return len(self.moves)
+
+    def is_over(self):
+        """ Get if the game is over
+
+        Returns:
+            bool -- True if the game has ended, False otherwise
+        """
+
+        return self.status not in (None, "created", "started")
+
+    def get_result(self):
+        """ Gets our result in the game
+
+        Returns:
+            str or None -- 'win', 'draw' or 'loss', or None if the game is
+                not over or did not count (aborted)
+        """
+
+        if not self.is_over() or self.status in ("aborted", "noStart"):
+            return None
+        if self.winner is None:
+            return "draw"
+        return "win" if self.winner == self.color else "loss"
+
+    def is_my_turn(self):
+        """ Get if it is our turn
+
+        Returns:
+            bool -- True if it is our turn in a started game and our move
+                was not made yet, False otherwise
+        """
+
+        with self.lock:
+            return (
+                self.is_synced
+                and self.status == "started"
+                and self.board.turn == (self.color == "white")
+                and self.move_pending_ply is None
+            )
+
+    def get_board(self):
+        """ Gets copy of current board
+
+        Returns:
+            chess.Board or None -- Current board or None if the state was not
+                recieved yet
+        """
+
+        with self.lock:
+            if not self.is_synced:
+                return None
+            return self.board.copy()
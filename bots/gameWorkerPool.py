@@ -0,0 +1,87 @@
+from collections import deque
+from threading import Thread, Condition
+
+from lib.misc import print_debug
+
+
+class GameWorkerPool:
+    """ Fixed number of threads handling games that have changed. A game is
+        handled by one worker at a time, and changes submitted while it is
+        pending or being handled are coalesced into one more run, so the
+        cost depends on the work to do and not on the number of games
+    """
+
+    def __init__(self, num_workers, handle_game):
+        """ GameWorkerPool constructor. Workers run once started (see start).
+            Games submitted before wait for them
+
+        Arguments:
+            num_workers {int} -- Number of worker threads
+            handle_game {function} -- Called with the ID of each game to
+                handle, from a worker
+        """
+
+        self.handle_game = handle_game
+
+        # Games waiting for a worker, in order of submission
+        self.queue = deque()
+        # Games submitted and not handled yet (in queue or running again
+        # after the current run)
+        self.pending = set()
+        # Games being handled
+        self.running = set()
+        self.condition = Condition()
+
+        self.workers = [
+            Thread(target=self.thread_worker, daemon=True) for _ in range(num_workers)
+        ]
+
+    def start(self):
+        """ Starts the workers
+
+        Returns:
+            GameWorkerPool -- This pool
+        """
+
+        for worker in self.workers:
+            worker.start()
+        return self
+
+    def submit(self, game_id):
+        """ Requests given game to be handled
+
+        Arguments:
+            game_id {str} -- Game ID in Lichess
+        """
+
+        with self.condition:
+            if game_id in self.pending:
+                return
+            self.pending.add(game_id)
+            # Games being handled are queued again when their run finishes
+            if game_id not in self.running:
+                self.queue.append(game_id)
+                self.condition.notify()
+
+    def thread_worker(self):
+        """ Thread to handle submitted games """
+
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: len(self.queue) > 0)
+                game_id = self.queue.popleft()
+                self.pending.discard(game_id)
+                self.running.add(game_id)
+
+            try:
+                self.handle_game(game_id)
+            except Exception as e:
+                print_debug(
+                    f"Exception handling game {game_id}. Exception: {e}", "ERROR"
+                )
+
+            with self.condition:
+                self.running.discard(game_id)
+                if game_id in self.pending:
+                    self.queue.append(game_id)
+                    self.condition.notify()
@@ -0,0 +1,192 @@
+from urllib.parse import urlparse
+from threading import Lock, Event
+
+import berserk
+from requests.adapters import HTTPAdapter
+
+from lib.misc import print_debug
+from lib.ratelimit import RateLimiter
+
+
+class LichessSession(berserk.TokenSession):
+    """ Lichess API session shared by all threads. Connections are kept
+        alive in a pool sized for all of them, and every request has a
+        timeout chosen by endpoint (see TIMEOUTS).
+        Requests are rate limited by priority (see PRIORITIES), so moves go
+        before polling, identical GETs in flight are made once and the
+        session backs off when Lichess answers 429 (Too Many Requests)
+    """
+
+    # Maximum number of connections kept alive to each host
+    POOL_SIZE = 32
+
+    # Timeouts (seconds) as (connect, read) by path prefix, first match is
+    # used. Streams send a keep-alive line every few seconds, so a long
+    # silence means the connection is lost
+    TIMEOUTS = [
+        ("/api/stream/", (5, 60)),
+        ("/api/bot/game/stream/", (5, 60)),
+        ("/api/bot/game/", (5, 5)),
+    ]
+    DEFAULT_TIMEOUT = (5, 15)
+
+    # Priority classes by path prefix, first match is used, 0 is the
+    # highest: game actions (moves, resign), then streams and challenges,
+    # then everything else (polling)
+    PRIORITIES = [
+        ("/api/stream/", 1),
+        ("/api/bot/game/stream/", 1),
+        ("/api/bot/game/", 0),
+        ("/api/challenge/", 1),
+    ]
+    DEFAULT_PRIORITY = 2
+
+    # Default requests per second and burst of the rate limiter, and
+    # requests of the burst kept for game actions (priority 0), so polling
+    # does not make moves wait for a token
+    RATE = 4
+    BURST = 8
+    RESERVE = 2
+    # Time (seconds) to back off after 429, if not given by Retry-After.
+    # Lichess asks to wait a full minute
+    RETRY_AFTER = 60
+
+    def __init__(
+        self, token, pool_size=POOL_SIZE, rate=RATE, burst=BURST, reserve=RESERVE
+    ):
+        """ LichessSession constructor
+
+        Arguments:
+            token {str} -- Lichess personal API token
+
+        Keyword Arguments:
+            pool_size {int} -- Maximum number of connections kept alive to
+                each host (default: {POOL_SIZE})
+            rate {float} -- Requests per second (default: {RATE})
+            burst {int} -- Requests made at once after being idle
+                (default: {BURST})
+            reserve {int} -- Requests of the burst only made by game actions
+                (default: {RESERVE})
+        """
+
+        super().__init__(token)
+
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+        self.rate_limiter = RateLimiter(rate, burst, reserve=reserve)
+
+        # GETs in flight, as {request key: (Event, [response, exception])}
+        self.inflight = {}
+        self.lock_inflight = Lock()
+
+    def request(self, method, url, **kwargs):
+        """ Makes request, with the endpoint timeout unless one is given.
+            GETs (not streamed) with the same URL and parameters as one in
+            flight wait for it and get its response
+
+        Arguments:
+            method {str} -- HTTP method
+            url {str} -- URL
+
+        Returns:
+            requests.Response -- Response
+        """
+
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = LichessSession.get_timeout(url)
+
+        if method.upper() != "GET" or kwargs.get("stream"):
+            return self.request_limited(method, url, **kwargs)
+
+        key = (url, repr(sorted((kwargs.get("params") or {}).items())))
+        with self.lock_inflight:
+            inflight = self.inflight.get(key)
+            is_leader = inflight is None
+            if is_leader:
+                inflight = self.inflight[key] = (Event(), [None, None])
+        done, result = inflight
+
+        # Other thread is making the same request
+        if not is_leader:
+            done.wait()
+            if result[1] is not None:
+                raise result[1]
+            return result[0]
+
+        try:
+            result[0] = self.request_limited(method, url, **kwargs)
+            return result[0]
+        except Exception as e:
+            result[1] = e
+            raise
+        finally:
+            with self.lock_inflight:
+                del self.inflight[key]
+            done.set()
+
+    def request_limited(self, method, url, **kwargs):
+        """ Makes request when the rate limiter allows it. If Lichess answers
+            429, pauses all requests and tries again once
+
+        Arguments:
+            method {str} -- HTTP method
+            url {str} -- URL
+
+        Returns:
+            requests.Response -- Response
+        """
+
+        priority = LichessSession.get_priority(url)
+
+        for _ in range(2):
+            self.rate_limiter.acquire(priority)
+            response = super().request(method, url, **kwargs)
+            if response.status_code != 429:
+                break
+
+            try:
+                retry_after = float(response.headers["Retry-After"])
+            except (KeyError, ValueError):
+                retry_after = LichessSession.RETRY_AFTER
+            print_debug(
+                f"Too many requests to Lichess, waiting {retry_after}s", "WARNING"
+            )
+            self.rate_limiter.pause(retry_after)
+
+        return response
+
+    @staticmethod
+    def get_timeout(url):
+        """ Gets timeout of requests to given URL
+
+        Arguments:
+            url {str} -- URL
+
+        Returns:
+            tuple -- Timeout (seconds) as (connect, read)
+        """
+
+        path = urlparse(url).path
+        for prefix, timeout in LichessSession.TIMEOUTS:
+            if path.startswith(prefix):
+                return timeout
+        return LichessSession.DEFAULT_TIMEOUT
+
+    @staticmethod
+    def get_priority(url):
+        """ Gets priority class of requests to given URL
+
+        Arguments:
+            url {str} -- URL
+
+        Returns:
+            int -- Priority class, 0 is the highest
+        """
+
+        path = urlparse(url).path
+        for prefix, priority in LichessSession.PRIORITIES:
+            if path.startswith(prefix):
+                return priority
+        return LichessSession.DEFAULT_PRIORITY
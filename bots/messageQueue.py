@@ -0,0 +1,153 @@
+import asyncio
+from collections import deque
+from threading import Condition
+
+
+class MessageQueue:
+    """ Bounded queue of chat messages between the IRC reader and the worker
+        that treats them. When full, the put policy decides what happens:
+        'block' waits for space (so the reader stops reading and the
+        connection pushes back), 'drop_oldest' discards the oldest queued
+        message and 'drop_newest' discards the message being put.
+        Thread-safe. Readers in an asyncio event loop use put_async, which
+        waits without blocking the loop
+    """
+
+    POLICIES = ("block", "drop_oldest", "drop_newest")
+
+    def __init__(self, max_size=10000, policy="drop_oldest"):
+        """ MessageQueue constructor
+
+        Keyword Arguments:
+            max_size {int} -- Maximum number of queued messages
+                (default: {10000})
+            policy {str} -- What to do when full, one of POLICIES
+                (default: {'drop_oldest'})
+
+        Raises:
+            ValueError: Unknown policy
+        """
+
+        if policy not in MessageQueue.POLICIES:
+            raise ValueError(f"Unknown message queue policy '{policy}'")
+
+        self.max_size = max_size
+        self.policy = policy
+
+        self.messages = deque()
+        self.condition = Condition()
+        # Futures of asyncio readers waiting for space, as (loop, future)
+        self.async_waiters = []
+
+        # Counters, read with get_stats
+        self.num_put = 0
+        self.num_dropped = 0
+        self.max_depth = 0
+
+    def put(self, message):
+        """ Puts message in queue, applying the policy if it is full
+
+        Arguments:
+            message {object} -- Message to put
+
+        Returns:
+            bool -- True if the message was queued, False if it was dropped
+        """
+
+        with self.condition:
+            self.num_put += 1
+
+            if len(self.messages) >= self.max_size:
+                if self.policy == "drop_newest":
+                    self.num_dropped += 1
+                    return False
+                elif self.policy == "drop_oldest":
+                    self.messages.popleft()
+                    self.num_dropped += 1
+                else:  # block
+                    self.condition.wait_for(lambda: len(self.messages) < self.max_size)
+
+            self.messages.append(message)
+            self.max_depth = max(self.max_depth, len(self.messages))
+            self.condition.notify_all()
+            return True
+
+    async def put_async(self, message):
+        """ Puts message in queue from an asyncio event loop, applying the
+            policy if it is full. With 'block' policy, only the calling task
+            waits for space, the rest of the loop keeps running
+
+        Arguments:
+            message {object} -- Message to put
+
+        Returns:
+            bool -- True if the message was queued, False if it was dropped
+        """
+
+        while True:
+            with self.condition:
+                if self.policy != "block" or len(self.messages) < self.max_size:
+                    return self.put(message)
+                loop = asyncio.get_running_loop()
+                waiter = loop.create_future()
+                self.async_waiters.append((loop, waiter))
+            await waiter
+
+    def get_many(self, max_messages, timeout=None):
+        """ Gets up to given number of messages, in the order they were put.
+            Waits until there is at least one message
+
+        Arguments:
+            max_messages {int} -- Maximum number of messages to get
+
+        Keyword Arguments:
+            timeout {float} -- Maximum time to wait in seconds
+                (default: {None}, waits forever)
+
+        Returns:
+            list -- Messages (empty in case of timeout)
+        """
+
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.messages) > 0, timeout)
+
+            num_messages = min(max_messages, len(self.messages))
+            messages = [self.messages.popleft() for _ in range(num_messages)]
+            # Wakes up readers blocked waiting for space
+            if num_messages > 0:
+                self.condition.notify_all()
+                for loop, waiter in self.async_waiters:
+                    try:
+                        loop.call_soon_threadsafe(MessageQueue.wake_waiter, waiter)
+                    except RuntimeError:
+                        # Event loop is closed
+                        pass
+                self.async_waiters.clear()
+            return messages
+
+    @staticmethod
+    def wake_waiter(waiter):
+        """ Wakes up asyncio reader waiting for space, from its event loop
+
+        Arguments:
+            waiter {asyncio.Future} -- Future the reader awaits
+        """
+
+        # Reader may have been cancelled meanwhile
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def get_stats(self):
+        """ Gets queue counters
+
+        Returns:
+            dict -- Counters as {'depth', 'max_depth', 'put', 'dropped'}
+        """
+
+        with self.condition:
+            return {
+                "depth": len(self.messages),
+                "max_depth": self.max_depth,
+                "put": self.num_put,
+                "dropped": self.num_dropped,
+            }
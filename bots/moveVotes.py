@@ -0,0 +1,143 @@
+import numpy as np
+import chess
+
+
+class MoveVotes:
+    """ Vote counts of a game turn, kept in a preallocated array indexed by
+        move key (see encode_move). Not thread-safe
+    """
+
+    # Moves are encoded as from_square * 64 + to_square, plus 4096 times
+    # the promotion index (0 for no promotion, 1 to 4 for knight to queen)
+    NUM_MOVE_KEYS = 64 * 64 * 5
+    # Key of resign votes, after all move keys
+    RESIGN_KEY = NUM_MOVE_KEYS
+
+    def __init__(self):
+        """ MoveVotes constructor """
+
+        self.counts = np.zeros(MoveVotes.NUM_MOVE_KEYS + 1, dtype=np.int32)
+        # Total number of votes, kept so queries do not sum the array
+        self.total = 0
+
+    @staticmethod
+    def encode_move(move):
+        """ Encodes given move as integer key
+
+        Arguments:
+            move {chess.Move} -- Move to encode
+
+        Returns:
+            int -- Move key
+        """
+
+        promotion = move.promotion - 1 if move.promotion is not None else 0
+        return promotion * 4096 + move.from_square * 64 + move.to_square
+
+    @staticmethod
+    def decode_move(key):
+        """ Decodes given move key
+
+        Arguments:
+            key {int} -- Move key (see encode_move)
+
+        Returns:
+            chess.Move -- Decoded move
+        """
+
+        promotion, squares = divmod(int(key), 4096)
+        return chess.Move(
+            squares // 64, squares % 64, promotion + 1 if promotion > 0 else None
+        )
+
+    def add(self, key, count=1):
+        """ Adds votes to given key
+
+        Arguments:
+            key {int} -- Move key or RESIGN_KEY
+
+        Keyword Arguments:
+            count {int} -- Number of votes (default: {1})
+        """
+
+        self.counts[key] += count
+        self.total += count
+
+    def add_many(self, keys):
+        """ Adds one vote to each of given keys (repeated keys are counted
+            once for each time they appear)
+
+        Arguments:
+            keys {list(int)} -- Move keys or RESIGN_KEY
+        """
+
+        if len(keys) == 0:
+            return
+        np.add.at(self.counts, np.asarray(keys, dtype=np.intp), 1)
+        self.total += len(keys)
+
+    def remove(self, key):
+        """ Removes all votes of given key
+
+        Arguments:
+            key {int} -- Move key or RESIGN_KEY
+        """
+
+        self.total -= int(self.counts[key])
+        self.counts[key] = 0
+
+    def clear(self):
+        """ Removes all votes, keeping the array allocated """
+
+        self.counts.fill(0)
+        self.total = 0
+
+    def get_total(self):
+        """ Gets total number of votes, resign included
+
+        Returns:
+            int -- Total number of votes
+        """
+
+        return self.total
+
+    def get_resign_votes(self):
+        """ Gets number of resign votes
+
+        Returns:
+            int -- Number of resign votes
+        """
+
+        return int(self.counts[MoveVotes.RESIGN_KEY])
+
+    def get_resign_ratio(self):
+        """ Gets ratio of resign votes over all votes
+
+        Returns:
+            float -- Ratio of resign votes (0 if there are no votes)
+        """
+
+        total = self.get_total()
+        return self.get_resign_votes() / total if total > 0 else 0
+
+    def get_top_moves(self, k=1):
+        """ Gets most voted moves (resign excluded)
+
+        Keyword Arguments:
+            k {int} -- Maximum number of moves to get (default: {1})
+
+        Returns:
+            list(tuple) -- List of (move key, votes), most voted first.
+                Only moves with votes are returned
+        """
+
+        move_counts = self.counts[: MoveVotes.NUM_MOVE_KEYS]
+        if k == 1:
+            keys = [int(move_counts.argmax())]
+        else:
+            keys = np.argpartition(move_counts, -k)[-k:]
+            keys = keys[np.argsort(move_counts[keys])[::-1]]
+
+        return [
+            (int(key), int(move_counts[key])) for key in keys if move_counts[key] > 0
+        ]
@@ -0,0 +1,148 @@
+import os
+import time
+import json
+from threading import Condition
+
+from lib.misc import print_debug
+
+
+class ObsState:
+    """ Information shown by OBS (URL and W-D-L), kept in memory and
+        published to a json file read by the OBS scripts. The file is
+        replaced atomically, so OBS never reads it half-written, and bursts
+        of changes are written at most once per WRITE_INTERVAL
+    """
+
+    # Minimum interval (seconds) between writes of the json file
+    WRITE_INTERVAL = 1
+
+    def __init__(self, path, create_info):
+        """ ObsState constructor. Loads information from the json file
+
+        Arguments:
+            path {str} -- Path of json file
+            create_info {function} -- Called to get the information (dict)
+                when the json file does not exist or is not valid
+        """
+
+        self.path = path
+
+        # Information as {field: value}, the source of truth of the file
+        self.info = self.read()
+        # Number of changes of info, so readers can wait for the next one
+        self.version = 0
+        # True if info has changes not written to file yet
+        self.is_dirty = self.info is None
+        if self.info is None:
+            self.info = create_info()
+            print_debug(f"Create {path} as OBS json", "DEBUG")
+
+        self.condition = Condition()
+
+    def read(self):
+        """ Reads information from json file
+
+        Returns:
+            dict or None -- Information or None in case of error
+        """
+
+        try:
+            with open(self.path, "r") as f:
+                info = json.load(f)
+            if isinstance(info, dict):
+                return info
+        except Exception as e:
+            print_debug(f"Unable to read OBS json. Exception: {e}", "DEBUG")
+        return None
+
+    def get(self):
+        """ Gets copy of information
+
+        Returns:
+            dict -- Information as {field: value}
+        """
+
+        with self.condition:
+            return dict(self.info)
+
+    def wait_change(self, version, timeout=None):
+        """ Waits until information changes after given version
+
+        Arguments:
+            version {int} -- Version already seen
+
+        Keyword Arguments:
+            timeout {float} -- Maximum time to wait in seconds
+                (default: {None}, waits forever)
+
+        Returns:
+            tuple -- Current (version, copy of information). Version is the
+                given one in case of timeout
+        """
+
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version, dict(self.info)
+
+    def update(self, **fields):
+        """ Updates given fields. The file is written later, by the writer
+            thread, and only if some field has changed
+
+        Returns:
+            bool -- True if some field has changed, False otherwise
+        """
+
+        with self.condition:
+            if all(self.info.get(field) == value for field, value in fields.items()):
+                return False
+            self.info.update(fields)
+            self.version += 1
+            self.is_dirty = True
+            self.condition.notify_all()
+            return True
+
+    def increment(self, field):
+        """ Adds one to given field (see update)
+
+        Arguments:
+            field {str} -- Field with integer value
+        """
+
+        with self.condition:
+            self.update(**{field: self.info.get(field, 0) + 1})
+
+    def thread_writer(self):
+        """ Thread to write information to json file when it changes """
+
+        last_write = 0
+
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.is_dirty)
+
+            # Waits for more changes to write them all at once
+            time.sleep(max(0, last_write + ObsState.WRITE_INTERVAL - time.monotonic()))
+
+            with self.condition:
+                text = json.dumps(self.info)
+                self.is_dirty = False
+
+            try:
+                self.write(text)
+                print_debug(f"Updated {self.path}", "DEBUG")
+            except Exception as e:
+                print_debug(f"Unable to write {self.path}. Exception: {e}", "ERROR")
+            last_write = time.monotonic()
+
+    def write(self, text):
+        """ Replaces json file with given text, writing it to a temporary
+            file first
+
+        Arguments:
+            text {str} -- File content
+        """
+
+        path_tmp = self.path + ".tmp"
+        with open(path_tmp, "w") as f:
+            f.write(text)
+        os.replace(path_tmp, self.path)
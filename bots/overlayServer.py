@@ -0,0 +1,100 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lib.misc import print_debug
+
+
+class OverlayServer(ThreadingHTTPServer):
+    """ Local HTTP server that pushes OBS information (ObsState) to overlays
+        as Server-Sent Events, the moment it changes:
+
+        GET /events -- Event stream, one 'data' event with the information
+            (json) when connected and after each change
+        GET /state -- Current information (json)
+    """
+
+    daemon_threads = True
+
+    # Interval (seconds) to send a comment to idle event streams, so closed
+    # connections are detected
+    KEEPALIVE_INTERVAL = 15
+
+    def __init__(self, obs_state, host="127.0.0.1", port=8765):
+        """ OverlayServer constructor
+
+        Arguments:
+            obs_state {ObsState} -- Information to push
+
+        Keyword Arguments:
+            host {str} -- Address to listen (default: {'127.0.0.1'})
+            port {int} -- Port to listen (default: {8765})
+        """
+
+        super().__init__((host, port), OverlayRequestHandler)
+        self.obs_state = obs_state
+
+    def thread_serve(self):
+        """ Thread to serve overlays forever """
+
+        print_debug("Serving overlay events on {}:{}", "INFO", *self.server_address)
+        self.serve_forever()
+
+
+class OverlayRequestHandler(BaseHTTPRequestHandler):
+    """ Handler of OverlayServer requests """
+
+    protocol_version = "HTTP/1.1"
+    # Events are small and must not wait for acknowledgements
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        """ Answers /state and /events requests """
+
+        if self.path == "/state":
+            body = json.dumps(self.server.obs_state.get()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == "/events":
+            self.send_events()
+        else:
+            self.send_error(404)
+
+    def send_events(self):
+        """ Sends information as events until the client disconnects """
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        # Stream ends with the connection
+        self.close_connection = True
+
+        obs_state = self.server.obs_state
+        # Gets current information without waiting (no version is None)
+        version, info = obs_state.wait_change(None, 0)
+
+        try:
+            while True:
+                if info is not None:
+                    self.wfile.write(f"data: {json.dumps(info)}\n\n".encode())
+                else:
+                    self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+
+                new_version, info = obs_state.wait_change(
+                    version, OverlayServer.KEEPALIVE_INTERVAL
+                )
+                if new_version == version:
+                    info = None
+                version = new_version
+        except OSError:
+            # Client disconnected
+            pass
+
+    def log_message(self, *args):
+        """ Does not log each request """
@@ -0,0 +1,76 @@
+import time
+
+from lib.misc import print_debug
+
+
+class PresenceCache:
+    """ Online status of Lichess users, fetched in bulk and kept for a
+        while. Statuses are replaced (never modified) when refreshed, so
+        they are read without lock
+    """
+
+    # Maximum number of users in each status request (Lichess API limit)
+    MAX_USERS_PER_REQUEST = 100
+
+    def __init__(self, client, ttl=15):
+        """ PresenceCache constructor
+
+        Arguments:
+            client {berserk.Client} -- Lichess API client
+
+        Keyword Arguments:
+            ttl {float} -- Time (seconds) a status is valid after fetched
+                (default: {15})
+        """
+
+        self.client = client
+        self.ttl = ttl
+
+        # Statuses as {user_id: (online, monotonic time fetched)}
+        self.statuses = {}
+
+    def refresh(self, user_ids):
+        """ Fetches online status of given users, in as few requests as
+            possible. Users not given are forgotten
+
+        Arguments:
+            user_ids {list(str)} -- Lichess user IDs
+        """
+
+        user_ids = sorted(set(user_ids))
+        statuses = {}
+
+        for i in range(0, len(user_ids), PresenceCache.MAX_USERS_PER_REQUEST):
+            ids = user_ids[i : i + PresenceCache.MAX_USERS_PER_REQUEST]
+            try:
+                users = self.client.users.get_realtime_statuses(*ids)
+            except Exception as e:
+                print_debug(f"Unable to get users status. Exception: {e}")
+                # Keeps last known statuses, until they expire
+                for user_id in ids:
+                    if user_id in self.statuses:
+                        statuses[user_id] = self.statuses[user_id]
+                continue
+
+            fetch_time = time.monotonic()
+            # Offline users only have 'id' and 'name'
+            for user in users:
+                statuses[user["id"]] = (user.get("online", False), fetch_time)
+
+        self.statuses = statuses
+
+    def is_online(self, user_id):
+        """ Gets if given user is online
+
+        Arguments:
+            user_id {str} -- Lichess user ID
+
+        Returns:
+            bool or None -- True if online, False if offline or None if the
+                status is unknown or expired
+        """
+
+        status = self.statuses.get(user_id)
+        if status is None or time.monotonic() - status[1] > self.ttl:
+            return None
+        return status[0]
@@ -0,0 +1,102 @@
+import sys
+from threading import Lock
+
+
+class VoterRegistry:
+    """ Users that already voted in the current turn of each game """
+
+    def __init__(self):
+        """ VoterRegistry constructor """
+
+        # Users that voted in each game, as {game_id: set(user)}. Sets are
+        # cleared, not replaced, at each turn
+        self.voters = {}
+        self.lock = Lock()
+
+    def add(self, game_id, user):
+        """ Sets given user as voted in given game
+
+        Arguments:
+            game_id {str} -- Game ID in Lichess
+            user {str} -- User in Twitch
+
+        Returns:
+            bool -- True if the user had not voted yet, False otherwise
+        """
+
+        # Interned, so users voting in many turns and games share the string
+        user = sys.intern(user)
+
+        with self.lock:
+            voters = self.voters.get(game_id)
+            if voters is None:
+                voters = self.voters[game_id] = set()
+            if user in voters:
+                return False
+            voters.add(user)
+            return True
+
+    def add_many(self, game_id, users):
+        """ Sets given users as voted in given game, taking the lock once
+
+        Arguments:
+            game_id {str} -- Game ID in Lichess
+            users {list(str)} -- Users in Twitch
+
+        Returns:
+            list(bool) -- For each user, True if they had not voted yet
+                (repeated users are only new the first time), False otherwise
+        """
+
+        users = [sys.intern(user) for user in users]
+
+        with self.lock:
+            voters = self.voters.get(game_id)
+            if voters is None:
+                voters = self.voters[game_id] = set()
+            num_voters = len(voters)
+            is_new = []
+            for user in users:
+                voters.add(user)
+                is_new.append(len(voters) > num_voters)
+                num_voters = len(voters)
+            return is_new
+
+    def has_voted(self, game_id, user):
+        """ Get if given user has already voted in given game
+
+        Arguments:
+            game_id {str} -- Game ID in Lichess
+            user {str} -- User in Twitch
+
+        Returns:
+            bool -- True if user has already voted, False otherwise
+        """
+
+        with self.lock:
+            voters = self.voters.get(game_id)
+            return voters is not None and user in voters
+
+    def reset(self, game_id):
+        """ Resets users that voted in given game (new turn)
+
+        Arguments:
+            game_id {str} -- Game ID in Lichess
+        """
+
+        with self.lock:
+            voters = self.voters.get(game_id)
+            if voters is not None:
+                voters.clear()
+
+    def evict(self, ongoing_game_ids):
+        """ Removes games that are not ongoing anymore
+
+        Arguments:
+            ongoing_game_ids {set(str)} -- IDs of ongoing games
+        """
+
+        with self.lock:
+            for game_id in list(self.voters.keys()):
+                if game_id not in ongoing_game_ids:
+                    del self.voters[game_id]
@@ -1,10 +1,39 @@
 config = {
     "twitch": {
-        "irc": {"server": "irc.twitch.tv", "port": 6667},
+        # Connections are spread across channels (at most one per channel)
+        "irc": {"server": "irc.twitch.tv", "port": 6667, "connections": 1},
         "account": {
             "username": "username",
             "password": "oauth:",  # http://twitchapps.com/tmi/
         },
+        # Channels to read votes from (empty for the account's own channel)
+        "channels": [],
+        # Chat messages waiting to be treated. When full, "drop_oldest" or
+        # "drop_newest" discards a message and "block" stops reading chat.
+        # Up to batch_size messages are treated (and voted) at once
+        "queue": {"max_size": 10000, "policy": "drop_oldest", "batch_size": 256},
     },
-    "lichess": {"token": "personal_token"},
+    "lichess": {
+        "token": "personal_token",
+        # Lichess API address, as a local mock (see benchmarks/mock_lichess.py)
+        "base_url": "https://lichess.org",
+        # Mode to choose moves: "anarchy" (moves as soon as there are votes)
+        # or "democracy" (moves the most voted when the voting window closes)
+        "mode": "anarchy",
+        # Democracy voting window (seconds) and number of votes that closes
+        # it earlier (0 to always wait the whole window)
+        "democracy": {"window": 15, "max_votes": 0},
+        # Requests per second to Lichess API, requests made at once after
+        # being idle and requests of them kept for moves. Moves always go
+        # before polling
+        "rate_limit": {"rate": 4, "burst": 8, "reserve": 2},
+        # Number of threads making moves, shared by all games
+        "game_workers": 4,
+    },
+    # Local server pushing OBS information (URL and W-D-L) to overlays as
+    # Server-Sent Events (GET /events). OBS scripts (obs/update_url.py and
+    # obs/update_WDL.py) follow it, or read the json file when disabled
+    "overlay": {"enabled": True, "host": "127.0.0.1", "port": 8765},
+    # Minimum type of messages to print and log ("DEBUG", "INFO" or "ERROR")
+    "log": {"level": "DEBUG"},
 }
@@ -1,30 +1,192 @@
 import time
 import os
-from datetime import datetime
+import sys
+import atexit
+from types import MappingProxyType
+from queue import Queue, Empty
+from threading import Thread
 
 LOG_FILE = "./server.log"
 
-# TODO: improve log file, its creation and logging
-# Create LOG_FILE
-if not os.path.exists(LOG_FILE):
-    with open(LOG_FILE, "w") as f:
-        f.write("")
+# Log levels by message type. Unknown types are logged as INFO
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "EXCEPTION": 40}
+# Messages with lower level than this are dropped (see set_log_level)
+log_level = LOG_LEVELS["DEBUG"]
 
+# Maximum number of messages written at once
+LOG_MAX_BATCH = 1024
+# Interval (seconds) to sync log file to disk
+LOG_FSYNC_INTERVAL = 5
+# Size (bytes) of log file to rotate it, keeping LOG_BACKUP_COUNT old files
+# as LOG_FILE.1, LOG_FILE.2, etc.
+LOG_MAX_SIZE = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# Messages to be written, as (time, type, message, args). None stops writer
+log_queue = Queue()
+
+
+def set_log_level(mtype):
+    """ Sets minimum type of messages to print and log
+
+    Arguments:
+        mtype {str} -- Message type, as 'DEBUG' or 'INFO'
+    """
+
+    global log_level
+    log_level = LOG_LEVELS.get(mtype.upper(), LOG_LEVELS["INFO"])
+
+
+def print_debug(message, mtype="INFO", *args):
+    """ Prints and logs given message. Message is formatted and written by
+        the log writer thread
 
-def print_debug(message, mtype="INFO"):
-    """ Prints and logs given message
-    
     Arguments:
         message {str} -- Message to print and log
-    
+
     Keyword Arguments:
         mtype {str} -- Message type (default: {'INFO'})
+        args -- Arguments to format message with ('{}' fields), so it is
+            only formatted if its type is logged
     """
 
     mtype = mtype.upper()
-    msg = "[{}] [{}] {}".format(
-        datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"), mtype, message
+    if LOG_LEVELS.get(mtype, LOG_LEVELS["INFO"]) < log_level:
+        return
+    log_queue.put((time.time(), mtype, message, args))
+
+
+def freeze(obj):
+    """ Gets read-only copy of given object, with dicts as MappingProxyType
+        and lists as tuples (recursively), so it can be shared between
+        threads without locks
+
+    Arguments:
+        obj {object} -- Object to freeze (dict, list or immutable value)
+
+    Returns:
+        object -- Read-only copy of object
+    """
+
+    if isinstance(obj, dict):
+        return MappingProxyType({key: freeze(value) for key, value in obj.items()})
+    if isinstance(obj, list):
+        return tuple(freeze(value) for value in obj)
+    return obj
+
+
+def rotate_log_file():
+    """ Renames LOG_FILE to LOG_FILE.1 (LOG_FILE.1 to LOG_FILE.2 and so on),
+        removing the oldest one
+    """
+
+    for i in range(LOG_BACKUP_COUNT - 1, 0, -1):
+        if os.path.exists(f"{LOG_FILE}.{i}"):
+            os.replace(f"{LOG_FILE}.{i}", f"{LOG_FILE}.{i + 1}")
+    if LOG_BACKUP_COUNT > 0:
+        os.replace(LOG_FILE, f"{LOG_FILE}.1")
+    else:
+        os.remove(LOG_FILE)
+
+
+def thread_log_writer():
+    """ Thread to print and write queued messages to LOG_FILE in batches """
+
+    f = open(LOG_FILE, "a")
+    last_fsync = time.time()
+    has_unsynced = False
+    running = True
+
+    while running:
+        # Waits for messages, syncing what has been written when idle
+        try:
+            records = [log_queue.get(timeout=LOG_FSYNC_INTERVAL)]
+        except Empty:
+            records = []
+        # Gets all other queued messages
+        while len(records) < LOG_MAX_BATCH:
+            try:
+                records.append(log_queue.get_nowait())
+            except Empty:
+                break
+
+        lines = []
+        for record in records:
+            if record is None:
+                running = False
+                continue
+            lines.append(format_log_record(*record))
+
+        # Errors are reported on stderr (they cannot be logged) and the
+        # writer keeps running, so the queue does not grow forever
+        if len(lines) > 0:
+            text = "".join(lines)
+            try:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            except Exception as e:
+                sys.stderr.write(f"Unable to print log. Exception: {e}\n")
+
+        try:
+            # Log file is reopened if it was closed by an error (as in
+            # rotation)
+            if f.closed:
+                f = open(LOG_FILE, "a")
+
+            if len(lines) > 0:
+                f.write(text)
+                f.flush()
+                has_unsynced = True
+
+            if has_unsynced and (
+                not running or time.time() - last_fsync >= LOG_FSYNC_INTERVAL
+            ):
+                os.fsync(f.fileno())
+                last_fsync = time.time()
+                has_unsynced = False
+
+            if f.tell() >= LOG_MAX_SIZE:
+                f.close()
+                rotate_log_file()
+                f = open(LOG_FILE, "a")
+        except Exception as e:
+            sys.stderr.write(f"Unable to write log file. Exception: {e}\n")
+
+    f.close()
+
+
+def format_log_record(timestamp, mtype, message, args):
+    """ Formats log message as a line of LOG_FILE
+
+    Arguments:
+        timestamp {float} -- Time of message
+        mtype {str} -- Message type
+        message {str} -- Message
+        args {tuple} -- Arguments to format message with
+
+    Returns:
+        str -- Line, with line ending. Messages unable to be formatted are
+            written as they are, followed by their arguments
+    """
+
+    if len(args) > 0:
+        try:
+            message = message.format(*args)
+        except Exception as e:
+            message = f"{message} {args!r} (unable to format: {e!r})"
+
+    return "[{}] [{}] {}\n".format(
+        time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(timestamp)), mtype, message
     )
-    print(msg, flush=True)
-    with open(LOG_FILE, "a+") as f:
-        f.write(msg + "\n")
+
+
+def stop_log_writer():
+    """ Writes pending messages and stops log writer thread """
+
+    log_queue.put(None)
+    log_writer.join(timeout=LOG_FSYNC_INTERVAL)
+
+
+log_writer = Thread(target=thread_log_writer, daemon=True)
+log_writer.start()
+atexit.register(stop_log_writer)
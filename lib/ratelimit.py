@@ -0,0 +1,99 @@
+import time
+from threading import Condition
+
+
+class RateLimiter:
+    """ Token bucket shared by threads, with priority classes: a token is
+        only taken when no thread of a higher priority (lower number) is
+        waiting for one, and the last tokens are reserved for the highest
+        class, so other classes cannot drain the bucket before it needs them.
+        Can be paused, as when the server asks to slow down
+    """
+
+    def __init__(self, rate, burst, num_priorities=3, reserve=0):
+        """ RateLimiter constructor
+
+        Arguments:
+            rate {float} -- Tokens added per second
+            burst {int} -- Maximum number of tokens (requests made at once
+                after being idle)
+
+        Keyword Arguments:
+            num_priorities {int} -- Number of priority classes, 0 is the
+                highest (default: {3})
+            reserve {int} -- Tokens only taken by priority class 0, at most
+                burst - 1 (default: {0})
+        """
+
+        self.rate = rate
+        self.burst = burst
+        self.reserve = max(0, min(reserve, burst - 1))
+
+        self.tokens = burst
+        self.last_refill = time.monotonic()
+        # Monotonic time until which no tokens are given (see pause)
+        self.paused_until = 0
+        # Number of threads waiting for a token in each priority class
+        self.waiting = [0] * num_priorities
+
+        self.condition = Condition()
+
+    def refill(self, now):
+        """ Adds tokens for the time passed since last refill (or since the
+            end of the pause). Must be called with condition held
+
+        Arguments:
+            now {float} -- Current monotonic time
+        """
+
+        if now > self.last_refill:
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.last_refill) * self.rate
+            )
+            self.last_refill = now
+
+    def acquire(self, priority):
+        """ Waits until a token can be taken by given priority class and
+            takes it
+
+        Arguments:
+            priority {int} -- Priority class, 0 is the highest
+        """
+
+        # Lower classes leave the reserved tokens in the bucket
+        needed = 1 if priority == 0 else 1 + self.reserve
+
+        with self.condition:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.refill(now)
+
+                    if now < self.paused_until:
+                        self.condition.wait(self.paused_until - now)
+                    elif any(self.waiting[:priority]):
+                        # Woken up when higher priority threads get tokens
+                        self.condition.wait()
+                    elif self.tokens >= needed:
+                        self.tokens -= 1
+                        return
+                    else:
+                        self.condition.wait((needed - self.tokens) / self.rate)
+            finally:
+                self.waiting[priority] -= 1
+                self.condition.notify_all()
+
+    def pause(self, seconds):
+        """ Gives no tokens for given time. Tokens start being added again
+            when the pause ends
+
+        Arguments:
+            seconds {float} -- Time (seconds) to pause
+        """
+
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            self.last_refill = self.paused_until
+            self.condition.notify_all()
@@ -0,0 +1,177 @@
+import time
+import heapq
+import itertools
+from queue import Queue
+from threading import Thread, Condition
+
+from lib.misc import print_debug
+
+
+class ScheduledJob:
+    """ Job run by Scheduler """
+
+    __slots__ = ("interval", "function", "args", "blocking", "running")
+
+    def __init__(self, interval, function, args, blocking):
+        """ ScheduledJob constructor
+
+        Arguments:
+            interval {float or None} -- Interval (seconds) between runs,
+                None to run once
+            function {function} -- Function to run
+            args {tuple} -- Function arguments
+            blocking {bool} -- Job may block (as on network requests), so it
+                runs in a worker thread
+        """
+
+        self.interval = interval
+        self.function = function
+        self.args = args
+        self.blocking = blocking
+        # Blocking job is running in a worker thread
+        self.running = False
+
+
+class Scheduler:
+    """ Runs periodic and delayed jobs at their deadlines. A single thread
+        sleeps until the next deadline, so idle jobs cost no wakeups.
+        Non-blocking jobs run in that thread, one at a time, so they must
+        return quickly (as waking up a game). Blocking jobs (as Lichess
+        requests) run in worker threads, so they never delay other
+        deadlines, and a periodic one is skipped while its last run is not
+        finished
+    """
+
+    # Default number of threads running blocking jobs
+    NUM_WORKERS = 4
+
+    def __init__(self, num_workers=NUM_WORKERS):
+        """ Scheduler constructor
+
+        Keyword Arguments:
+            num_workers {int} -- Number of threads running blocking jobs
+                (default: {NUM_WORKERS})
+        """
+
+        # Jobs as heap of (deadline, sequence, ScheduledJob). Sequence keeps
+        # jobs with same deadline in order of scheduling
+        self.jobs = []
+        self.sequence = itertools.count()
+        self.condition = Condition()
+
+        # Blocking jobs to run, taken by the worker threads
+        self.blocking_jobs = Queue()
+        self.num_workers = num_workers
+        self.thread = None
+
+    def start(self):
+        """ Starts threads that run jobs
+
+        Returns:
+            Scheduler -- This scheduler
+        """
+
+        self.thread = Thread(target=self.thread_run_jobs, daemon=True)
+        self.thread.start()
+        for _ in range(self.num_workers):
+            Thread(target=self.thread_run_blocking_jobs, daemon=True).start()
+        return self
+
+    def every(self, interval, function, *args, delay=0, blocking=False):
+        """ Runs function periodically. Deadlines are kept at fixed rate
+            (missed ones are skipped, not run late in a burst)
+
+        Arguments:
+            interval {float} -- Interval (seconds) between runs
+            function {function} -- Function to run
+            args -- Function arguments
+
+        Keyword Arguments:
+            delay {float} -- Time (seconds) until first run (default: {0})
+            blocking {bool} -- Function may block, so it runs in a worker
+                thread (default: {False})
+        """
+
+        job = ScheduledJob(interval, function, args, blocking)
+        self.schedule(time.monotonic() + delay, job)
+
+    def call_after(self, delay, function, *args, blocking=False):
+        """ Runs function once after given time
+
+        Arguments:
+            delay {float} -- Time (seconds) until run
+            function {function} -- Function to run
+            args -- Function arguments
+
+        Keyword Arguments:
+            blocking {bool} -- Function may block, so it runs in a worker
+                thread (default: {False})
+        """
+
+        job = ScheduledJob(None, function, args, blocking)
+        self.schedule(time.monotonic() + delay, job)
+
+    def schedule(self, deadline, job):
+        """ Adds job, waking up the thread if it is the next one
+
+        Arguments:
+            deadline {float} -- Monotonic time to run
+            job {ScheduledJob} -- Job to run
+        """
+
+        with self.condition:
+            entry = (deadline, next(self.sequence), job)
+            heapq.heappush(self.jobs, entry)
+            if self.jobs[0] is entry:
+                self.condition.notify()
+
+    def thread_run_jobs(self):
+        """ Thread to run jobs at their deadlines """
+
+        while True:
+            with self.condition:
+                while True:
+                    now = time.monotonic()
+                    if len(self.jobs) > 0 and self.jobs[0][0] <= now:
+                        break
+                    self.condition.wait(
+                        self.jobs[0][0] - now if len(self.jobs) > 0 else None
+                    )
+                deadline, _, job = heapq.heappop(self.jobs)
+
+            if not job.blocking:
+                self.run_job(job)
+            elif not job.running:
+                job.running = True
+                self.blocking_jobs.put(job)
+
+            # Schedules next run of periodic job, skipping missed deadlines
+            if job.interval is not None:
+                deadline += job.interval
+                now = time.monotonic()
+                if deadline < now:
+                    deadline += ((now - deadline) // job.interval + 1) * job.interval
+                self.schedule(deadline, job)
+
+    def thread_run_blocking_jobs(self):
+        """ Worker thread to run blocking jobs """
+
+        while True:
+            self.run_job(self.blocking_jobs.get())
+
+    def run_job(self, job):
+        """ Runs job, logging its exceptions
+
+        Arguments:
+            job {ScheduledJob} -- Job to run
+        """
+
+        try:
+            job.function(*job.args)
+        except Exception as e:
+            print_debug(
+                f"Exception in scheduled {job.function.__name__}. Exception: {e}",
+                "ERROR",
+            )
+        finally:
+            job.running = False
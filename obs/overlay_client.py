@@ -0,0 +1,89 @@
+""" Overlay client: subscribes to the overlay events of BotHandler
+(OverlayServer) and gets each update as it arrives. Used by the OBS
+scripts (update_url.py, update_WDL.py), or run alone to print the updates.
+
+Usage:
+    python obs/overlay_client.py [host] [port]
+"""
+
+import sys
+import json
+import time
+import http.client
+
+# Time (seconds) without data to consider the connection lost. The server
+# sends a keep-alive comment every 15 seconds
+READ_TIMEOUT = 40
+# Time (seconds) to wait before subscribing again after losing connection
+RECONNECT_DELAY = 3
+
+
+def read_events(host, port):
+    """ Subscribes to overlay events and yields the information of each one
+        (None for keep-alive comments)
+
+    Arguments:
+        host {str} -- Overlay server address
+        port {int} -- Overlay server port
+
+    Raises:
+        OSError: Unable to subscribe or connection lost
+    """
+
+    connection = http.client.HTTPConnection(host, port, timeout=READ_TIMEOUT)
+    try:
+        connection.request("GET", "/events")
+        response = connection.getresponse()
+        if response.status != 200:
+            raise OSError(
+                f"Unable to subscribe to overlay events ({response.status})"
+            )
+
+        # Events are 'data: <json>' lines, separated by blank lines. Lines
+        # starting with ':' are keep-alive comments
+        for line in response:
+            line = line.decode().rstrip("\n")
+            if line.startswith("data: "):
+                yield json.loads(line[len("data: ") :])
+            elif line.startswith(":"):
+                yield None
+    finally:
+        connection.close()
+
+
+def follow_events(host, port, on_info, stop):
+    """ Calls given function with the information of each overlay event,
+        subscribing again whenever the connection is lost, until stopped
+
+    Arguments:
+        host {str} -- Overlay server address
+        port {int} -- Overlay server port
+        on_info {function} -- Called with the information (dict) of each
+            event
+        stop {threading.Event} -- Set to stop following events. Checked
+            when events and keep-alives arrive
+    """
+
+    while not stop.is_set():
+        try:
+            for info in read_events(host, port):
+                if stop.is_set():
+                    return
+                if info is not None:
+                    on_info(info)
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            print(f"Lost overlay events ({host}:{port}). Exception: {e}")
+        stop.wait(RECONNECT_DELAY)
+
+
+def main():
+    host = sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1"
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+
+    for info in read_events(host, port):
+        if info is not None:
+            print(time.strftime("[%H:%M:%S]"), info)
+
+
+if __name__ == "__main__":
+    main()
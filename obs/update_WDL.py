@@ -1,20 +1,35 @@
 import os
 
 import json
+from threading import Thread, Event
+
 import obspython as obs
 
+from overlay_client import follow_events
+
 abs_path = os.path.dirname(os.path.abspath(__file__))
+curr_text = ""
+# Modification time and size of the file when it was last read
+file_stat = None
 file_input = ""
 interval = 30
 source_name = ""
+# Overlay server events, as "host:port". Updates are pushed as soon as they
+# happen, instead of reading the json file every interval
+events_address = ""
+# Set to stop following events of the overlay server
+events_stop = None
 
 
 def update_curr_text(source, new_text):
+    global curr_text
+
     try:
         settings = obs.obs_data_create()
         obs.obs_data_set_string(settings, "text", new_text)
         obs.obs_source_update(source, settings)
         obs.obs_data_release(settings)
+        curr_text = new_text
 
     except Exception as e:
         obs.script_log(obs.LOG_WARNING, str(e))
@@ -24,36 +39,99 @@ def update_curr_text(source, new_text):
 # ------------------------------------------------------------
 
 
+def get_file_stat():
+    # Tries to find the file in relative location, then with absolute location
+    for filename in (file_input, os.path.join(abs_path, file_input)):
+        try:
+            stat = os.stat(filename)
+            return filename, (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+    return None, None
+
+
 def update_text():
-    global abs_path
-    global curr_url
-    global file_input
-    global interval
-    global source_name
+    global file_stat
+
+    # Only reads the file when it has changed
+    filename, stat = get_file_stat()
+    if filename is None or stat == file_stat:
+        return
+
+    try:
+        with open(filename, "r") as f:
+            dict_info = json.load(f)
+        string_WDL = get_string_WDL(dict_info)
+    except Exception as e:
+        print(f"Unable to read W-D-L from json {filename}. Exception: {e}")
+        return
+
+    # File is read again on next tick until the source is updated
+    if apply_text(string_WDL):
+        file_stat = stat
+
+
+def get_string_WDL(dict_info):
+    string_WDL = f'{dict_info["wins"]}\n'
+    string_WDL += f'{dict_info["draws"]}\n'
+    string_WDL += f'{dict_info["losses"]}'
+    return string_WDL
+
 
+def apply_text(string_WDL):
+    # Only updates the source when the text has changed. Returns whether the
+    # source shows it (False if it does not exist yet or was not updated)
+    if string_WDL == curr_text:
+        return True
     source = obs.obs_get_source_by_name(source_name)
-    if source is not None:
-        # Tries to find the file in relative location
-        filename = file_input
-        if not os.path.exists(file_input):
-            # Tries to find file with absolute location
-            filename = os.path.join(abs_path, file_input)
-
-        if os.path.exists(filename):
-            try:
-                with open(filename, "r") as f:
-                    dict_info = json.load(f)
-                    string_WDL = f'{dict_info["wins"]}\n'
-                    string_WDL += f'{dict_info["draws"]}\n'
-                    string_WDL += f'{dict_info["losses"]}'
-                    update_curr_text(source, string_WDL)
-            except Exception as e:
-                print(f"Unable to read URL from json {filename}. Exception: {e}")
-        obs.obs_source_release(source)
+    if source is None:
+        return False
+    update_curr_text(source, string_WDL)
+    obs.obs_source_release(source)
+    return string_WDL == curr_text
+
+
+def apply_info(info):
+    apply_text(get_string_WDL(info))
+
+
+def reset_text():
+    global curr_text
+    global file_stat
+
+    curr_text = ""
+    file_stat = None
 
 
 def refresh_pressed(props, prop):
-    update_text()
+    reset_text()
+    if events_address != "":
+        # Subscribes again, so current information is sent
+        stop_events()
+        start_events()
+    else:
+        update_text()
+
+
+def start_events():
+    global events_stop
+
+    host, _, port = events_address.rpartition(":")
+    events_stop = Event()
+    thread = Thread(
+        target=follow_events,
+        args=(host, int(port), apply_info, events_stop),
+        daemon=True,
+    )
+    thread.start()
+
+
+def stop_events():
+    global events_stop
+
+    if events_stop is not None:
+        events_stop.set()
+        events_stop = None
 
 
 # ------------------------------------------------------------
@@ -61,8 +139,8 @@ def refresh_pressed(props, prop):
 
 def script_description():
     return (
-        "Reads 'wins', 'draws' and 'losses' field from json and updates it in"
-        + "text, separating each one by a new line\n\nby Waine"
+        "Reads 'wins', 'draws' and 'losses' field from overlay events (or json)"
+        + " and updates it in text, separating each one by a new line\n\nby Waine"
     )
 
 
@@ -70,23 +148,43 @@ def script_update(settings):
     global file_input
     global interval
     global source_name
+    global events_address
 
     file_input = obs.obs_data_get_string(settings, "file_input")
     interval = obs.obs_data_get_int(settings, "interval")
     source_name = obs.obs_data_get_string(settings, "source")
+    events_address = obs.obs_data_get_string(settings, "events")
 
     obs.timer_remove(update_text)
-
-    if file_input != "" and source_name != "":
+    stop_events()
+    reset_text()
+
+    if source_name == "":
+        return
+    # Overlay events are used if given, otherwise the json file is read
+    if events_address != "":
+        start_events()
+    elif file_input != "":
         obs.timer_add(update_text, interval * 1000)
 
 
+def script_unload():
+    stop_events()
+
+
 def script_defaults(settings):
     obs.obs_data_set_default_int(settings, "interval", 5)
+    obs.obs_data_set_default_string(settings, "events", "127.0.0.1:8765")
 
 
 def script_properties():
     props = obs.obs_properties_create()
+    obs.obs_properties_add_text(
+        props,
+        "events",
+        "Overlay events (host:port, empty to read json)",
+        obs.OBS_TEXT_DEFAULT,
+    )
     obs.obs_properties_add_text(
         props, "file_input", "Read from (json)", obs.OBS_TEXT_DEFAULT
     )